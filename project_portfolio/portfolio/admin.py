@@ -2,14 +2,22 @@
 Portfolio admin configuration
 """
 
+from django.conf import settings
 from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import path, reverse
 from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+
+from . import article_search, profiling
+from .thumbnails import thumbnail_url
 from .models import (
     Skill, Project, ContactMessage, SiteSettings,
     ProjectCategory, Technology,
     Tag, Article,
     WorkExperience, Education, Certification, ResumeSettings,
-    Testimonial, Tool
+    Testimonial, Tool, RequestProfile, OutboxEmail
 )
 
 
@@ -76,31 +84,48 @@ class ArticleAdmin(admin.ModelAdmin):
 
     actions = ['publish_articles', 'unpublish_articles']
 
+    def get_search_results(self, request, queryset, search_term):
+        """Use the search index instead of LIKE scans over every article body"""
+        if not search_term:
+            return super().get_search_results(request, queryset, search_term)
+        results = article_search.search(search_term, published_only=False)
+        return queryset.filter(pk__in=[article_id for article_id, score in results.ranked]), False
+
     def image_preview(self, obj):
         """Small thumbnail for list display"""
         from django.utils.html import format_html
-        image_url = obj.get_featured_image()
-        if image_url and image_url != '/static/image/default-article.png':
-            return format_html('<img src="{}" style="max-height: 40px; max-width: 60px; object-fit: cover; border-radius: 4px;"/>', image_url)
-        return "-"
+        if obj.featured_image_file:
+            image_url = thumbnail_url(obj.featured_image_file, 'list')
+        elif obj.featured_image_url:
+            image_url = obj.featured_image_url
+        else:
+            return "-"
+        return format_html('<img src="{}" style="max-height: 40px; max-width: 60px; object-fit: cover; border-radius: 4px;"/>', image_url)
     image_preview.short_description = "Image"
 
     def image_preview_large(self, obj):
         """Large preview for edit form"""
         from django.utils.html import format_html
         if obj.featured_image_file:
-            return format_html('<img src="{}" style="max-height: 200px; max-width: 300px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px;"/>', obj.featured_image_file.url)
+            return format_html('<img src="{}" style="max-height: 200px; max-width: 300px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px;"/>', thumbnail_url(obj.featured_image_file, 'preview'))
         elif obj.featured_image_url:
             return format_html('<img src="{}" style="max-height: 200px; max-width: 300px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px;"/>', obj.featured_image_url)
         return "No image uploaded"
     image_preview_large.short_description = "Current Image"
 
     def publish_articles(self, request, queryset):
-        queryset.update(status='published', published_at=timezone.now())
+        # Saved one by one so updated_at and the cache invalidation signals fire
+        now = timezone.now()
+        for article in queryset:
+            article.status = 'published'
+            article.published_at = now
+            article.save()
     publish_articles.short_description = "Publish selected articles"
 
     def unpublish_articles(self, request, queryset):
-        queryset.update(status='draft')
+        for article in queryset:
+            article.status = 'draft'
+            article.save()
     unpublish_articles.short_description = "Unpublish selected articles"
 
 
@@ -188,7 +213,7 @@ class SkillAdmin(admin.ModelAdmin):
     def icon_preview(self, obj):
         """Small thumbnail for list display"""
         from django.utils.html import format_html
-        icon_url = obj.get_icon_url()
+        icon_url = thumbnail_url(obj.icon_file, 'icon') if obj.icon_file else obj.get_icon_url()
         if icon_url:
             return format_html('<img src="{}" style="max-height: 32px; max-width: 32px; object-fit: contain;"/>', icon_url)
         elif obj.get_icon_class():
@@ -200,7 +225,7 @@ class SkillAdmin(admin.ModelAdmin):
         """Large preview for edit form"""
         from django.utils.html import format_html
         if obj.icon_file:
-            return format_html('<img src="{}" style="max-height: 128px; max-width: 128px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px; background: #f5f5f5;"/>', obj.icon_file.url)
+            return format_html('<img src="{}" style="max-height: 128px; max-width: 128px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px; background: #f5f5f5;"/>', thumbnail_url(obj.icon_file, 'icon_preview'))
         return "No icon uploaded"
     icon_preview_large.short_description = "Current Icon"
 
@@ -245,7 +270,7 @@ class ProjectAdmin(admin.ModelAdmin):
         """Small thumbnail for list display"""
         from django.utils.html import format_html
         if obj.image_file:
-            return format_html('<img src="{}" style="max-height: 40px; max-width: 60px; object-fit: cover; border-radius: 4px;"/>', obj.image_file.url)
+            return format_html('<img src="{}" style="max-height: 40px; max-width: 60px; object-fit: cover; border-radius: 4px;"/>', thumbnail_url(obj.image_file, 'list'))
         elif obj.image:
             return format_html('<img src="{}" style="max-height: 40px; max-width: 60px; object-fit: cover; border-radius: 4px;"/>', obj.image)
         return "-"
@@ -255,7 +280,7 @@ class ProjectAdmin(admin.ModelAdmin):
         """Large preview for edit form"""
         from django.utils.html import format_html
         if obj.image_file:
-            return format_html('<img src="{}" style="max-height: 200px; max-width: 300px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px;"/>', obj.image_file.url)
+            return format_html('<img src="{}" style="max-height: 200px; max-width: 300px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px;"/>', thumbnail_url(obj.image_file, 'preview'))
         elif obj.image:
             return format_html('<img src="{}" style="max-height: 200px; max-width: 300px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px;"/>', obj.image)
         return "No image uploaded"
@@ -265,7 +290,7 @@ class ProjectAdmin(admin.ModelAdmin):
         """Icon preview for edit form"""
         from django.utils.html import format_html
         if obj.icon_file:
-            return format_html('<img src="{}" style="max-height: 128px; max-width: 128px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px; background: #f5f5f5;"/>', obj.icon_file.url)
+            return format_html('<img src="{}" style="max-height: 128px; max-width: 128px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px; background: #f5f5f5;"/>', thumbnail_url(obj.icon_file, 'icon_preview'))
         return "No icon uploaded"
     icon_preview_large.short_description = "Current Icon"
 
@@ -282,6 +307,27 @@ class ContactMessageAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'recipients', 'last_error')
+    readonly_fields = (
+        'subject', 'body', 'from_email', 'recipients', 'reply_to', 'contact_message',
+        'status', 'attempts', 'next_attempt_at', 'last_error', 'created_at', 'sent_at',
+    )
+    actions = ['retry_emails']
+
+    def has_add_permission(self, request):
+        return False
+
+    def retry_emails(self, request, queryset):
+        # Dead letters get a fresh set of attempts; the worker picks them up on its next poll
+        count = queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f'{count} emails queued for retry')
+    retry_emails.short_description = "Retry selected emails now"
+
+
 @admin.register(SiteSettings)
 class SiteSettingsAdmin(admin.ModelAdmin):
     list_display = ('author_name', 'author_email')
@@ -323,7 +369,7 @@ class ToolAdmin(admin.ModelAdmin):
     def icon_preview(self, obj):
         """Small thumbnail for list display"""
         from django.utils.html import format_html
-        icon_url = obj.get_icon_url()
+        icon_url = thumbnail_url(obj.icon_file, 'icon') if obj.icon_file else obj.get_icon_url()
         if icon_url:
             return format_html('<img src="{}" style="max-height: 32px; max-width: 32px; object-fit: contain;"/>', icon_url)
         return "-"
@@ -333,8 +379,95 @@ class ToolAdmin(admin.ModelAdmin):
         """Large preview for edit form"""
         from django.utils.html import format_html
         if obj.icon_file:
-            return format_html('<img src="{}" style="max-height: 128px; max-width: 128px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px; background: #f5f5f5;"/>', obj.icon_file.url)
+            return format_html('<img src="{}" style="max-height: 128px; max-width: 128px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px; background: #f5f5f5;"/>', thumbnail_url(obj.icon_file, 'icon_preview'))
         elif obj.icon_url:
             return format_html('<img src="{}" style="max-height: 128px; max-width: 128px; object-fit: contain; border: 1px solid #ddd; border-radius: 8px; padding: 4px; background: #f5f5f5;"/>', obj.icon_url)
         return "No icon uploaded"
     icon_preview_large.short_description = "Current Icon"
+
+
+# =============================================================================
+# Profiling Admin
+# =============================================================================
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('path', 'url_name', 'duration_ms', 'status_code', 'trigger', 'created_at')
+    list_filter = ('url_name', 'trigger', 'created_at')
+    search_fields = ('path',)
+    ordering = ('-created_at',)
+    fields = (
+        'path', 'url_name', 'method', 'status_code', 'duration_ms', 'trigger', 'created_at',
+        'downloads', 'top_cumulative', 'top_tottime',
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                'profiling-header/',
+                self.admin_site.admin_view(self.issue_header_view),
+                name='portfolio_requestprofile_issue_header',
+            ),
+            path(
+                '<int:pk>/download/<str:kind>/',
+                self.admin_site.admin_view(self.download_view),
+                name='portfolio_requestprofile_download',
+            ),
+        ] + super().get_urls()
+
+    def issue_header_view(self, request):
+        """Show a signed X-Profile header value for the current staff user"""
+        token = profiling.issue_token(request.user)
+        minutes = settings.PROFILING_TOKEN_MAX_AGE // 60
+        self.message_user(request, f'{profiling.HEADER}: {token} (valid for {minutes} minutes)')
+        return redirect('admin:portfolio_requestprofile_changelist')
+
+    def download_view(self, request, pk, kind):
+        """The raw pstats (.prof, for snakeviz/pstats) or collapsed stacks (flamegraph input)"""
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if kind == 'pstats':
+            response = HttpResponse(profiling.prof_file(profile.stats), content_type='application/octet-stream')
+            extension = 'prof'
+        elif kind == 'collapsed':
+            response = HttpResponse(profile.collapsed_stacks, content_type='text/plain; charset=utf-8')
+            extension = 'folded'
+        else:
+            return HttpResponse(status=404)
+        response['Content-Disposition'] = f'attachment; filename="profile-{profile.pk}.{extension}"'
+        return response
+
+    def downloads(self, obj):
+        return format_html(
+            '<a href="{}">pstats (.prof)</a> &middot; <a href="{}">collapsed stacks (.folded)</a>',
+            reverse('admin:portfolio_requestprofile_download', args=(obj.pk, 'pstats')),
+            reverse('admin:portfolio_requestprofile_download', args=(obj.pk, 'collapsed')),
+        )
+
+    def _top_table(self, obj, sort):
+        rows = profiling.top_functions(obj.stats, sort=sort)
+        return format_html(
+            '<table><thead><tr><th>Function</th><th>Calls</th><th>Own (ms)</th>'
+            '<th>Cumulative (ms)</th><th>Location</th></tr></thead><tbody>{}</tbody></table>',
+            format_html_join('', '<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>', (
+                (
+                    row['function'], row['calls'],
+                    f"{row['tottime'] * 1000:.2f}", f"{row['cumtime'] * 1000:.2f}", row['location'],
+                )
+                for row in rows
+            )),
+        )
+
+    def top_cumulative(self, obj):
+        return self._top_table(obj, 'cumulative')
+    top_cumulative.short_description = "Top functions by cumulative time"
+
+    def top_tottime(self, obj):
+        return self._top_table(obj, 'tottime')
+    top_tottime.short_description = "Top functions by own time"
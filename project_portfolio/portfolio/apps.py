@@ -0,0 +1,13 @@
+"""
+Portfolio app configuration
+"""
+
+from django.apps import AppConfig
+
+
+class PortfolioConfig(AppConfig):
+    name = 'portfolio'
+
+    def ready(self):
+        from .signals import connect_signals
+        connect_signals()
@@ -0,0 +1,234 @@
+"""
+Article search - Inverted index over articles with BM25 ranking
+
+Each article is tokenized into ``ArticleSearchPosting`` rows (term, article,
+field-weighted frequency) plus one ``ArticleSearchDocument`` row holding its
+length. A query only reads the postings of its own terms, so its cost grows
+with the number of matching articles rather than the size of every article
+body. Signals in signals.py re-index an article whenever it or its tags change.
+"""
+
+import math
+import re
+from collections import Counter, namedtuple
+
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Article, ArticleSearchDocument, ArticleSearchPosting
+
+
+# Title and tag hits count for more than hits in the body
+FIELD_WEIGHTS = {
+    'title': 3.0,
+    'tags': 2.0,
+    'excerpt': 1.5,
+    'content': 1.0,
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# The last query word matches as a prefix once it is this long
+MIN_PREFIX_LENGTH = 2
+MAX_TERM_LENGTH = 64
+
+SNIPPET_WORDS = 30
+
+STOP_WORDS = frozenset('''
+    a an and are as at be but by for from has have i if in into is it its of on
+    or so that the their then there these this to was we were will with you your
+'''.split())
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# Markdown syntax that should not be indexed or shown in snippets
+_MARKDOWN_LINK_RE = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+_MARKDOWN_SYMBOLS_RE = re.compile(r'[#*_`>~|]+')
+
+SearchResults = namedtuple('SearchResults', ['ranked', 'terms'])
+
+
+def plain_text(markdown_text):
+    """Strip the markdown syntax that would otherwise leak into snippets"""
+    text = _MARKDOWN_LINK_RE.sub(r'\1', markdown_text or '')
+    return _MARKDOWN_SYMBOLS_RE.sub(' ', text)
+
+
+def tokenize(text):
+    return [
+        token for token in (match.lower() for match in _TOKEN_RE.findall(text or ''))
+        if token not in STOP_WORDS and len(token) <= MAX_TERM_LENGTH
+    ]
+
+
+# =============================================================================
+# Indexing
+# =============================================================================
+
+def analyze(article):
+    """Return the field-weighted term frequencies of an article"""
+    fields = {
+        'title': article.title,
+        'tags': ' '.join(tag.name for tag in article.tags.all()),
+        'excerpt': article.excerpt,
+        'content': plain_text(article.content),
+    }
+    frequencies = Counter()
+    for field, text in fields.items():
+        for token in tokenize(text):
+            frequencies[token] += FIELD_WEIGHTS[field]
+    return frequencies
+
+
+def index_article(article):
+    """Replace the postings of a single article"""
+    frequencies = analyze(article)
+    with transaction.atomic():
+        ArticleSearchPosting.objects.filter(article_id=article.pk).delete()
+        ArticleSearchPosting.objects.bulk_create([
+            ArticleSearchPosting(term=term, article_id=article.pk, frequency=frequency)
+            for term, frequency in frequencies.items()
+        ])
+        ArticleSearchDocument.objects.update_or_create(
+            article_id=article.pk, defaults={'length': sum(frequencies.values())},
+        )
+
+
+def rebuild_index():
+    with transaction.atomic():
+        ArticleSearchPosting.objects.all().delete()
+        ArticleSearchDocument.objects.all().delete()
+        for article in Article.objects.prefetch_related('tags'):
+            index_article(article)
+
+
+# =============================================================================
+# Querying
+# =============================================================================
+
+def parse_query(query):
+    """Split a query into exact terms and an optional trailing prefix"""
+    terms = tokenize(query)
+    if terms and len(terms[-1]) >= MIN_PREFIX_LENGTH:
+        return terms[:-1], terms[-1]
+    return terms, None
+
+
+def _bm25(frequency, document_frequency, length, total, average_length):
+    idf = math.log(1 + (total - document_frequency + 0.5) / (document_frequency + 0.5))
+    norm = K1 * (1 - B + B * length / (average_length or 1))
+    return idf * frequency * (K1 + 1) / (frequency + norm)
+
+
+def search(query, published_only=True):
+    """
+    Rank articles against ``query``.
+
+    Every word must match; the last word also matches as a prefix so results
+    appear while typing. Returns ``SearchResults`` with ``ranked`` as
+    ``[(article_id, score)]`` best first and ``terms`` as the set of indexed
+    terms that matched, for highlighting.
+    """
+    exact_terms, prefix = parse_query(query)
+    if not exact_terms and not prefix:
+        return SearchResults([], set())
+
+    condition = Q(term__in=exact_terms) if exact_terms else Q()
+    if prefix:
+        condition |= Q(term__startswith=prefix)
+
+    postings = ArticleSearchPosting.objects.filter(condition)
+    documents = ArticleSearchDocument.objects.all()
+    if published_only:
+        postings = postings.filter(article__status='published')
+        documents = documents.filter(article__status='published')
+
+    # term -> {article_id: frequency}
+    postings_by_term = {}
+    for term, article_id, frequency in postings.values_list('term', 'article_id', 'frequency'):
+        postings_by_term.setdefault(term, {})[article_id] = frequency
+
+    # Each query word is a group of index terms; a prefix expands to several
+    groups = [[term] for term in dict.fromkeys(exact_terms)]
+    if prefix:
+        groups.append([term for term in postings_by_term if term.startswith(prefix)])
+
+    candidates = None
+    for group in groups:
+        matching = set().union(*(postings_by_term.get(term, {}) for term in group))
+        candidates = matching if candidates is None else candidates & matching
+    if not candidates:
+        return SearchResults([], set())
+
+    stats = documents.aggregate(total=Count('pk'), average_length=Avg('length'))
+    lengths = dict(documents.filter(article_id__in=candidates).values_list('article_id', 'length'))
+
+    scores = {}
+    for article_id in candidates:
+        score = 0.0
+        for group in groups:
+            # A prefix counts once, through its best-scoring expansion
+            score += max(
+                _bm25(
+                    postings_by_term[term][article_id], len(postings_by_term[term]),
+                    lengths.get(article_id, 0), stats['total'], stats['average_length'],
+                )
+                for term in group if article_id in postings_by_term.get(term, {})
+            )
+        scores[article_id] = score
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    matched_terms = {term for group in groups for term in group}
+    return SearchResults(ranked, matched_terms)
+
+
+# =============================================================================
+# Highlighting
+# =============================================================================
+
+def highlight(text, terms):
+    """Escape ``text`` and wrap every word that matched the query in <mark>"""
+    parts = []
+    position = 0
+    for match in _TOKEN_RE.finditer(text):
+        if match.group().lower() in terms:
+            parts.append(escape(text[position:match.start()]))
+            parts.append(f'<mark>{escape(match.group())}</mark>')
+            position = match.end()
+    parts.append(escape(text[position:]))
+    return mark_safe(''.join(parts))
+
+
+def snippet(article, terms, length=SNIPPET_WORDS):
+    """Return the highlighted window of the article with the most matching words"""
+    words = plain_text(article.content).split()
+    hits = [any(token.lower() in terms for token in _TOKEN_RE.findall(word)) for word in words]
+
+    if not any(hits):
+        # Matched on the title or tags only
+        text = article.get_excerpt() or ' '.join(words[:length])
+        return highlight(text, terms)
+
+    best_start, best_count = 0, -1
+    count = sum(hits[:length])
+    for start in range(max(1, len(words) - length + 1)):
+        if start:
+            count += (hits[start + length - 1] if start + length - 1 < len(words) else 0) - hits[start - 1]
+        if count > best_count:
+            best_start, best_count = start, count
+
+    window = ' '.join(words[best_start:best_start + length])
+    prefix = '… ' if best_start else ''
+    suffix = ' …' if best_start + length < len(words) else ''
+    return mark_safe(prefix + highlight(window, terms) + suffix)
+
+
+def attach_highlights(articles, terms):
+    """Set ``search_title`` and ``search_snippet`` on each article for display"""
+    for article in articles:
+        article.search_title = highlight(article.title, terms)
+        article.search_snippet = snippet(article, terms)
+    return articles
@@ -0,0 +1,263 @@
+"""
+Portfolio caching - Full-page cache and per-worker memoized values
+
+Rendered pages are stored in the shared Django cache, keyed by URL and the
+query parameters the view reads. Every key also embeds the current version token of the content groups
+the page is built from, so bumping a group (see signals.py) orphans exactly
+the pages that depend on it without having to enumerate them. The same version
+tokens tell each gunicorn worker when its in-memory copies have gone stale.
+"""
+
+import hashlib
+import os
+import time
+import uuid
+from functools import lru_cache, wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from . import metrics
+
+
+# =============================================================================
+# Content Groups
+# =============================================================================
+
+HOME = 'home'
+PROJECTS = 'projects'
+BLOG = 'blog'
+RESUME = 'resume'
+
+PAGE_GROUPS = (HOME, PROJECTS, BLOG, RESUME)
+
+# Not a page: versions the pre-serialized /api/tools/ payload
+TOOLS = 'tools'
+
+# Rendered in place of the per-visitor CSRF token while a page is being cached
+CSRF_TOKEN_PLACEHOLDER = '__page_cache_csrf_token__'
+
+
+def _version_key(group):
+    return f'cache:version:{group}'
+
+
+def get_group_versions(groups):
+    """Return the current version token of each group, creating missing ones"""
+    keys = [_version_key(group) for group in groups]
+    versions = cache.get_many(keys)
+
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # Tokens are random rather than counters so a culled key can never
+        # come back with a value an old page was cached under.
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, None)
+        versions.update(cache.get_many(missing))
+
+    return tuple(versions.get(key, '') for key in keys)
+
+
+def bump_groups(*groups):
+    """Invalidate every cached page and local value built from the given groups"""
+    cache.set_many({_version_key(group): uuid.uuid4().hex for group in groups}, None)
+
+
+# =============================================================================
+# Page Cache
+# =============================================================================
+
+def _is_cacheable_request(request):
+    """Only anonymous, session-less reads are served from the page cache"""
+    return (
+        getattr(settings, 'PAGE_CACHE_ENABLED', True)
+        and not getattr(request, 'bypass_page_cache', False)
+        and request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+    )
+
+
+def _accepts_validators(request):
+    """
+    Whether a read may be answered with validators and 304s, cached or not.
+
+    Not while flash messages are waiting in their cookie: a 304 would leave
+    them undisplayed.
+    """
+    return request.method in ('GET', 'HEAD') and CookieStorage.cookie_name not in request.COOKIES
+
+
+@lru_cache(maxsize=None)
+def release_token():
+    """Identify the deployed templates so a deploy never serves old markup"""
+    if settings.PAGE_CACHE_RELEASE:
+        return settings.PAGE_CACHE_RELEASE
+
+    digest = hashlib.md5()
+    for template_dir in settings.TEMPLATES[0]['DIRS']:
+        for root, dirs, files in sorted(os.walk(template_dir)):
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                digest.update(f'{root}/{name}:{stat.st_mtime_ns}:{stat.st_size}'.encode())
+    return digest.hexdigest()
+
+
+def _page_key(request, versions, params=()):
+    # Only parameters the view reads, so tracking tags and junk cannot mint new entries
+    query = urlencode(sorted((name, request.GET.getlist(name)) for name in params if name in request.GET), doseq=True)
+    url = f'{request.scheme}://{request.get_host()}{request.path}?{query}'
+    digest = hashlib.md5(f'{release_token()}|{url}|{"|".join(versions)}'.encode()).hexdigest()
+    return f'page-cache:page:{digest}'
+
+
+def _insert_csrf_token(request, content):
+    placeholder = CSRF_TOKEN_PLACEHOLDER.encode()
+    if placeholder in content:
+        content = content.replace(placeholder, get_token(request).encode())
+    return content
+
+
+def _set_validators(response, etag, last_modified):
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    # Browsers keep the page but must revalidate it, which costs a 304 at most
+    patch_cache_control(response, private=True, no_cache=True)
+
+
+def cached_page(*groups, last_modified=None, params=()):
+    """
+    Cache a view's rendered output for anonymous visitors.
+
+    The page is invalidated whenever one of ``groups`` is bumped. When
+    ``last_modified(request, *args, **kwargs)`` is given, responses carry
+    ETag/Last-Modified validators and matching conditional requests are
+    answered with a 304 before the view renders anything. Validators are sent
+    to every visitor, including those with a session and with the page cache
+    off; a session visitor's ETag includes their session cookie.
+
+    ``params`` lists the query parameters the view reads; any others are
+    ignored by the cache key, so the view must not depend on them.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(request, *args, **kwargs):
+            cacheable = _is_cacheable_request(request)
+            conditional = last_modified is not None and _accepts_validators(request)
+            if not cacheable and not conditional:
+                return view_func(request, *args, **kwargs)
+
+            key = _page_key(request, get_group_versions(groups), params)
+            if cacheable:
+                entry = cache.get(key)
+                metrics.count_cache('page', entry is not None)
+
+                if entry is not None:
+                    response = HttpResponse(
+                        _insert_csrf_token(request, entry['content']),
+                        content_type=entry['content_type'],
+                    )
+                    etag, timestamp = entry.get('etag'), entry.get('last_modified')
+                    _set_validators(response, etag, timestamp)
+                    response['X-Page-Cache'] = 'HIT'
+                    return get_conditional_response(
+                        request, etag=etag, last_modified=timestamp, response=response,
+                    )
+
+            etag = timestamp = None
+            if conditional:
+                modified = last_modified(request, *args, **kwargs)
+                if modified is not None:
+                    timestamp = int(modified.timestamp())
+                    # The key already encodes the URL and the group versions,
+                    # which also catches deletions that leave no newer timestamp.
+                    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME, '')
+                    etag = 'W/' + quote_etag(hashlib.md5(f'{key}|{timestamp}|{session}'.encode()).hexdigest())
+
+                    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+                    if response is not None:
+                        # Same validators and caching policy as the full response
+                        _set_validators(response, etag, timestamp)
+                        return response
+
+            if not cacheable:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code == 200 and not response.streaming:
+                    _set_validators(response, etag, timestamp)
+                return response
+
+            request.page_cache_miss = True
+            response = view_func(request, *args, **kwargs)
+
+            if response.streaming:
+                return response
+
+            if response.status_code == 200 and not response.cookies:
+                cache.set(key, {
+                    'content': response.content,
+                    'content_type': response['Content-Type'],
+                    'etag': etag,
+                    'last_modified': timestamp,
+                }, settings.PAGE_CACHE_TIMEOUT)
+                _set_validators(response, etag, timestamp)
+                response['X-Page-Cache'] = 'MISS'
+
+            response.content = _insert_csrf_token(request, response.content)
+            return response
+
+        return _wrapped_view
+    return decorator
+
+
+# =============================================================================
+# Process-local Values
+# =============================================================================
+
+_MISSING = object()
+
+
+class LocalValue:
+    """
+    Per-worker memo of a value loaded by ``loader``.
+
+    The value lives in process memory. The shared version token of ``group``
+    is only consulted every ``LOCAL_CACHE_RECHECK_SECONDS``, so an
+    invalidation in one worker reaches every other worker within that bound.
+    """
+
+    def __init__(self, group, loader):
+        self.group = group
+        self.loader = loader
+        self._value = _MISSING
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self):
+        now = time.monotonic()
+        recheck = getattr(settings, 'LOCAL_CACHE_RECHECK_SECONDS', 5)
+
+        hit = True
+        if self._value is _MISSING or now - self._checked_at >= recheck:
+            # Read the version before loading so a concurrent bump is never
+            # recorded against data that predates it.
+            version = get_group_versions((self.group,))[0]
+            if self._value is _MISSING or version != self._version:
+                self._value = self.loader()
+                self._version = version
+                hit = False
+            self._checked_at = now
+
+        metrics.count_cache(f'local:{self.group}', hit)
+        return self._value
+
+    def invalidate(self):
+        """Drop this worker's copy and tell the other workers to reload"""
+        self._value = _MISSING
+        bump_groups(self.group)
@@ -0,0 +1,107 @@
+"""
+Project facets - In-memory bitsets for filter counts on the projects page
+
+Every project gets a bit position; each category and technology keeps a
+Python int with the bits of its projects set. Filtering is a handful of
+AND/OR operations on those ints and each facet count is a popcount, so any
+filter combination is answered without touching the database. The bitsets
+live per worker and are rebuilt when the PROJECTS group is bumped, which
+signals.py does for every project, category or technology change.
+"""
+
+from .cache import PROJECTS, LocalValue
+from .models import Project, ProjectCategory, Technology
+
+
+def popcount(bits):
+    return bin(bits).count('1')
+
+
+class ProjectFacets:
+
+    def __init__(self):
+        rows = list(Project.objects.values_list('pk', 'project_category_id'))
+        self.project_ids = [pk for pk, category_id in rows]
+        self.positions = position = {pk: index for index, pk in enumerate(self.project_ids)}
+        self.all_bits = (1 << len(rows)) - 1
+
+        self.categories = list(ProjectCategory.objects.values('pk', 'slug', 'name'))
+        category_bits = {category['pk']: 0 for category in self.categories}
+        for pk, category_id in rows:
+            if category_id in category_bits:
+                category_bits[category_id] |= 1 << position[pk]
+        self.category_bits = {category['slug']: category_bits[category['pk']] for category in self.categories}
+
+        self.technologies = list(Technology.objects.values('pk', 'slug', 'name', 'category'))
+        technology_bits = {technology['pk']: 0 for technology in self.technologies}
+        links = Project.technologies.through.objects.values_list('project_id', 'technology_id')
+        for project_id, technology_id in links:
+            # Each query sees its own snapshot, so rows added in between are skipped
+            # here and picked up by the rebuild their save triggers
+            if project_id in position and technology_id in technology_bits:
+                technology_bits[technology_id] |= 1 << position[project_id]
+        self.technology_bits = {
+            technology['slug']: technology_bits[technology['pk']] for technology in self.technologies
+        }
+
+    def mask_for_ids(self, project_ids):
+        bits = 0
+        for pk in project_ids:
+            if pk in self.positions:
+                bits |= 1 << self.positions[pk]
+        return bits
+
+    def ids(self, bits):
+        """Project ids whose bits are set, in the default project ordering"""
+        return [pk for index, pk in enumerate(self.project_ids) if bits >> index & 1]
+
+    def query(self, categories=(), technologies=(), within=None):
+        """
+        Match projects in any of ``categories`` that use all of ``technologies``.
+
+        Category counts ignore the category selection and technology counts
+        include it, so each count says how many results picking that value
+        would give. ``within`` restricts everything to a bitmask, e.g. the
+        matches of a text search.
+        """
+        scope = self.all_bits if within is None else within
+
+        category_mask = self.all_bits
+        if categories:
+            category_mask = 0
+            for slug in categories:
+                category_mask |= self.category_bits.get(slug, 0)
+
+        technology_mask = self.all_bits
+        for slug in technologies:
+            technology_mask &= self.technology_bits.get(slug, 0)
+
+        matches = scope & category_mask & technology_mask
+        return {
+            'ids': self.ids(matches),
+            'count': popcount(matches),
+            'categories': [
+                {
+                    'slug': category['slug'],
+                    'name': category['name'],
+                    'count': popcount(self.category_bits[category['slug']] & scope & technology_mask),
+                }
+                for category in self.categories
+            ],
+            'technologies': [
+                {
+                    'slug': technology['slug'],
+                    'name': technology['name'],
+                    'category': technology['category'],
+                    'count': popcount(self.technology_bits[technology['slug']] & matches),
+                }
+                for technology in self.technologies
+            ],
+        }
+
+
+_facets = LocalValue(PROJECTS, ProjectFacets)
+
+
+def get_project_facets():
+    return _facets.get()
@@ -32,6 +32,13 @@ class ContactForm(forms.Form):
         })
     )
 
+    def clean_full_name(self):
+        full_name = self.cleaned_data.get('full_name', '')
+        # The name goes into the notification email's Subject header
+        if '\r' in full_name or '\n' in full_name:
+            raise forms.ValidationError('Please enter your name on a single line.')
+        return full_name
+
     def clean_email(self):
         email = self.cleaned_data.get('email')
         if email:
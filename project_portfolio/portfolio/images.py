@@ -0,0 +1,203 @@
+"""
+Responsive images - Resized AVIF/WebP/JPEG variants of uploaded images
+
+When an image is uploaded (see signals.py) it is decoded once with Pillow and
+re-encoded at each breakpoint width that is smaller than the original, in
+every modern format plus a JPEG fallback (PNG when the image has
+transparency). Variants are stored next to the original as
+``<name>-<width>w.<ext>``. Their names and dimensions are recorded in a JSON
+field on the model, so templates can build ``srcset`` attributes without
+touching storage.
+
+AVIF is only produced when the installed Pillow can encode it (Pillow 11.3+
+built with libavif, or the pillow-avif-plugin package).
+"""
+
+import io
+import logging
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+
+logger = logging.getLogger('portfolio.images')
+
+# Breakpoint widths per kind of image, in CSS pixels at 1x and 2x density
+CARD_WIDTHS = (320, 640, 960, 1200)
+ICON_WIDTHS = (64, 128)
+
+# Image field -> JSON field holding its variants, and the widths to generate
+IMAGE_FIELDS = {
+    'portfolio.Article': (('featured_image_file', 'featured_image_variants', CARD_WIDTHS),),
+    'portfolio.Project': (('image_file', 'image_variants', CARD_WIDTHS),),
+    'portfolio.Tool': (('icon_file', 'icon_variants', ICON_WIDTHS),),
+}
+
+# format -> (MIME type, file extension, Pillow save options), best first
+FORMATS = {
+    'avif': ('image/avif', 'avif', {'quality': 55, 'speed': 8}),
+    'webp': ('image/webp', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('image/jpeg', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'png': ('image/png', 'png', {'optimize': True}),
+}
+MODERN_FORMATS = ('avif', 'webp')
+
+
+@lru_cache(maxsize=None)
+def _can_encode(name):
+    if name == 'avif':
+        if features.check('avif'):
+            return True
+        try:
+            import pillow_avif  # noqa: F401 - registers the AVIF plugin
+        except ImportError:
+            return False
+        return True
+    return features.check(name) if name == 'webp' else True
+
+
+def output_formats(has_alpha):
+    fallback = 'png' if has_alpha else 'jpeg'
+    return [name for name in MODERN_FORMATS if _can_encode(name)] + [fallback]
+
+
+# =============================================================================
+# Generation
+# =============================================================================
+
+def _target_widths(original_width, widths):
+    """Breakpoints below the original, plus the original capped at the largest breakpoint"""
+    targets = {width for width in widths if width < original_width}
+    targets.add(min(original_width, max(widths)))
+    return sorted(targets)
+
+
+def open_image(field_file):
+    """Decode ``field_file`` upright; return ``(image, has_alpha)`` in RGB or RGBA"""
+    field_file.open('rb')
+    try:
+        image = Image.open(field_file)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    finally:
+        field_file.close()
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    return image.convert('RGBA' if has_alpha else 'RGB'), has_alpha
+
+
+def _encode(image, name):
+    options = FORMATS[name][2]
+    buffer = io.BytesIO()
+    image.save(buffer, format=name.upper(), **options)
+    return buffer.getvalue()
+
+
+def generate_variants(field_file, widths):
+    """Write the variants of ``field_file`` to its storage and return their record"""
+    image, has_alpha = open_image(field_file)
+    original_width, original_height = image.size
+    storage = field_file.storage
+    root = os.path.splitext(field_file.name)[0]
+
+    formats = {}
+    for width in _target_widths(original_width, widths):
+        height = max(1, round(original_height * width / original_width))
+        resized = image if width == original_width else image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+        for name in output_formats(has_alpha):
+            variant_name = f'{root}-{width}w.{FORMATS[name][1]}'
+            if storage.exists(variant_name):
+                storage.delete(variant_name)
+            saved = storage.save(variant_name, ContentFile(_encode(resized, name)))
+            formats.setdefault(name, []).append({'name': saved, 'width': width, 'height': height})
+
+    return {
+        'source': field_file.name,
+        'width': original_width,
+        'height': original_height,
+        'formats': formats,
+    }
+
+
+def delete_variants(variants, storage):
+    for files in variants.get('formats', {}).values():
+        for variant in files:
+            storage.delete(variant['name'])
+
+
+def sync_variants(instance, force=False):
+    """
+    Bring the variant records of ``instance`` in line with its image fields.
+
+    Returns the names of the JSON fields that changed. They are written with
+    ``update()``, so saving the variants does not fire post_save again.
+    """
+    changed = {}
+    for file_field, variants_field, widths in IMAGE_FIELDS[instance._meta.label]:
+        field_file = getattr(instance, file_field)
+        variants = getattr(instance, variants_field) or {}
+        current = field_file.name or ''
+        if variants.get('source', '') == current and not force:
+            continue
+
+        storage = field_file.storage
+        if variants:
+            delete_variants(variants, storage)
+        new_variants = {}
+        if current:
+            try:
+                new_variants = generate_variants(field_file, widths)
+            except (OSError, ValueError, Image.DecompressionBombError) as error:
+                # Keep serving the original rather than failing the save
+                logger.warning('Could not generate variants of %s: %s', current, error)
+                new_variants = {'source': current, 'error': str(error)}
+        setattr(instance, variants_field, new_variants)
+        changed[variants_field] = new_variants
+
+    if changed:
+        type(instance)._default_manager.filter(pk=instance.pk).update(**changed)
+    return list(changed)
+
+
+# =============================================================================
+# Rendering
+# =============================================================================
+
+@dataclass
+class ResponsiveImage:
+    """What a ``<picture>`` needs: fallback src/srcset, modern-format sources and intrinsic size"""
+    src: str
+    srcset: str = ''
+    sources: list = field(default_factory=list)
+    width: int = None
+    height: int = None
+
+
+def _srcset(files, storage):
+    return ', '.join(f'{storage.url(variant["name"])} {variant["width"]}w' for variant in files)
+
+
+def responsive_image(field_file, variants, fallback_src):
+    """``ResponsiveImage`` for an image field, or just ``fallback_src`` when it has no variants"""
+    formats = (variants or {}).get('formats')
+    if not field_file or not formats or variants.get('source') != field_file.name:
+        return ResponsiveImage(src=fallback_src)
+
+    storage = field_file.storage
+    sources = [
+        {'type': FORMATS[name][0], 'srcset': _srcset(formats[name], storage)}
+        for name in MODERN_FORMATS if name in formats
+    ]
+    fallback = formats.get('jpeg') or formats.get('png') or []
+    # The largest variant has the original's aspect ratio and is what browsers pick without srcset
+    largest = fallback[-1] if fallback else {'width': variants['width'], 'height': variants['height']}
+    return ResponsiveImage(
+        src=storage.url(fallback[-1]['name']) if fallback else fallback_src,
+        srcset=_srcset(fallback, storage),
+        sources=sources,
+        width=largest['width'],
+        height=largest['height'],
+    )
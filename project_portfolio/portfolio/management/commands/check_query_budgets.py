@@ -0,0 +1,70 @@
+"""
+Management command to enforce the per-view query budgets and catch N+1s.
+Run with: python manage.py check_query_budgets [--url /extra/path/]
+
+Each public page is requested twice with the full-page cache off: once to
+warm the per-worker caches (site settings, tools payload, facets) and once
+under the query audit. The command fails when a view runs more queries than its entry in
+settings.QUERY_BUDGETS or repeats a query fingerprint, and prints the
+template or code line behind each repeat.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import resolve
+
+from portfolio.query_audit import QueryAudit, public_urls, query_budget
+
+
+class Command(BaseCommand):
+    help = 'Fails when a public view exceeds its query budget or repeats a query'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            action='append',
+            default=[],
+            help='Additional path to check (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        client = Client()
+        failures = []
+        caches = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-budgets'}}
+
+        with override_settings(
+            PAGE_CACHE_ENABLED=False, CACHES=caches, ALLOWED_HOSTS=['testserver'],
+            QUERY_AUDIT_ENABLED=False, METRICS_ENABLED=False,
+        ):
+            for url in public_urls() + options['url']:
+                client.get(url)
+                audit = QueryAudit()
+                with connection.execute_wrapper(audit):
+                    response = client.get(url)
+
+                url_name = resolve(url.split('?')[0]).url_name
+                budget = query_budget(url_name)
+                repeated = audit.repeated(settings.QUERY_AUDIT_REPEAT_THRESHOLD)
+                over_budget = budget is not None and audit.count > budget
+
+                if over_budget:
+                    failures.append(f'{url}: {audit.count} queries, {url_name} budget is {budget}')
+                for key, count, sites in repeated:
+                    failures.append(f'{url}: {count} x {key}\n' + '\n'.join(
+                        f'    {times} x {site}' for site, times in sites
+                    ))
+
+                style = self.style.ERROR if over_budget or repeated else self.style.SUCCESS
+                self.stdout.write(style(
+                    f'{url} -> {response.status_code}, {audit.count} queries '
+                    f'(budget {budget if budget is not None else "-"}), {len(repeated)} repeated'
+                ))
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(f'\n{failure}')
+            raise CommandError(f'{len(failures)} query budget or N+1 failures')
+
+        self.stdout.write(self.style.SUCCESS('All views within their query budgets'))
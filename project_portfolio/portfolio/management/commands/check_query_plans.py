@@ -0,0 +1,133 @@
+"""
+Management command to EXPLAIN every query the public views run.
+Run with: python manage.py check_query_plans [--min-rows 1000] [--url /extra/path/]
+
+Each public page is requested with the page and fragment caches off, every
+SELECT it issues is run through EXPLAIN, and the command fails when a plan
+reads a whole table holding more than --min-rows rows. Run it against a
+seeded database so the planner sees realistic table sizes; supported on
+PostgreSQL and SQLite.
+"""
+
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+
+from portfolio.query_audit import QueryAudit, public_urls
+
+
+SQLITE_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+# Django aliases repeated joins of one table as T2, T3, ...
+TABLE_ALIAS_RE = re.compile(r'"(\w+)" (T\d+)\b')
+# Only filtered or limited reads can be served by an index; a bare SELECT of a
+# whole table (e.g. the facets bitset load) is a deliberate full read
+INDEXABLE_RE = re.compile(r'\b(WHERE|LIMIT)\b')
+
+
+class Command(BaseCommand):
+    help = 'Fails when a public view runs a sequential scan on a large table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Tables with more rows than this must not be scanned sequentially',
+        )
+        parser.add_argument(
+            '--url',
+            action='append',
+            default=[],
+            help='Additional path to check (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'EXPLAIN parsing is not implemented for {connection.vendor}')
+
+        self.min_rows = options['min_rows']
+        self.row_counts = {}
+        self.tables = set(connection.introspection.table_names())
+
+        client = Client()
+        failures = []
+        dummy_cache = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+        with override_settings(
+            PAGE_CACHE_ENABLED=False, CACHES=dummy_cache, ALLOWED_HOSTS=['testserver'], QUERY_AUDIT_ENABLED=False,
+            METRICS_ENABLED=False,
+        ):
+            for url in public_urls() + options['url']:
+                audit = QueryAudit(locate=False)
+                with connection.execute_wrapper(audit):
+                    response = client.get(url)
+
+                unique = {}
+                for sql, params in audit.selects():
+                    unique.setdefault((sql, repr(params)), (sql, params))
+
+                scans = []
+                for sql, params in unique.values():
+                    for table in self.sequential_scans(sql, params):
+                        rows = self.row_count(table)
+                        scans.append((table, rows, sql))
+
+                too_large = [
+                    scan for scan in scans if scan[1] > self.min_rows and INDEXABLE_RE.search(scan[2])
+                ]
+                failures.extend((url, *scan) for scan in too_large)
+
+                style = self.style.ERROR if too_large else self.style.SUCCESS
+                self.stdout.write(style(
+                    f'{url} -> {response.status_code}, {audit.count} queries, '
+                    f'{len(scans)} sequential scans ({len(too_large)} over {self.min_rows} rows)'
+                ))
+                for table, rows, sql in scans:
+                    self.stdout.write(f'    SCAN {table} ({rows} rows)')
+
+        if failures:
+            for url, table, rows, sql in failures:
+                self.stderr.write(f'\n{url}: sequential scan on {table} ({rows} rows)\n    {sql}')
+            raise CommandError(f'{len(failures)} sequential scans on tables above {self.min_rows} rows')
+
+        self.stdout.write(self.style.SUCCESS('No sequential scans on large tables'))
+
+    # -------------------------------------------------------------------------
+    # Plans
+    # -------------------------------------------------------------------------
+
+    def sequential_scans(self, sql, params):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return list(self._postgres_scans(plan[0]['Plan']))
+
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            aliases = {alias: table for table, alias in TABLE_ALIAS_RE.findall(sql)}
+            scans = []
+            for row in cursor.fetchall():
+                match = SQLITE_SCAN_RE.match(row[-1])
+                if match:
+                    table = aliases.get(match.group(1), match.group(1))
+                    if table in self.tables:
+                        scans.append(table)
+            return scans
+
+    def _postgres_scans(self, node):
+        if node.get('Node Type') == 'Seq Scan':
+            yield node['Relation Name']
+        for child in node.get('Plans', []):
+            yield from self._postgres_scans(child)
+
+    def row_count(self, table):
+        if table not in self.row_counts:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                self.row_counts[table] = cursor.fetchone()[0]
+        return self.row_counts[table]
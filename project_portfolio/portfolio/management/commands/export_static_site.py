@@ -0,0 +1,234 @@
+"""
+Management command to pre-render every public page into static files.
+Run with: python manage.py export_static_site [--output DIR] [--host example.com] [--force]
+
+Each page is written as <path>/index.html with .gz (and .br when Brotli is
+installed) siblings, so nginx or WhiteNoise can serve it without Python.
+Blog pagination is written to blog/cursor/<token>/index.html; map
+``?cursor=<token>`` onto it at the web server, e.g. for nginx:
+
+    if ($arg_cursor) { rewrite ^(/blog/.*)$ $1cursor/$arg_cursor/ last; }
+
+CSRF tokens are stripped from the pages; the home page's contact form fetches
+one from /contact/token/ before posting, so the static host must forward
+/contact/ and /contact/token/ to Django.
+
+The export is incremental: a manifest records a hash of the rows each page is
+built from, and only pages whose source rows changed are rendered again.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+
+from portfolio.cache import release_token
+from portfolio.pagination import KeysetPaginator
+from portfolio.views import ARTICLES_PER_PAGE
+from portfolio.models import (
+    Project, Testimonial, SiteSettings, Tool,
+    ProjectCategory, Technology,
+    Tag, Article, RelatedArticle,
+    WorkExperience, Education, Certification, ResumeSettings, Skill
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+MANIFEST_NAME = '.export-manifest.json'
+
+CSRF_INPUT_RE = re.compile(rb'<input type="hidden" name="csrfmiddlewaretoken" value="[^"]*">')
+
+
+def rows_digest(queryset, *fields):
+    """Hash the given columns of every row in ``queryset``"""
+    rows = queryset.order_by('pk').values_list('pk', *fields)
+    return hashlib.sha256(repr(list(rows)).encode()).hexdigest()
+
+
+def combine(*digests):
+    return hashlib.sha256('|'.join(digests).encode()).hexdigest()
+
+
+class Command(BaseCommand):
+    help = 'Pre-renders every public page into static HTML with gzip/brotli siblings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=str(settings.BASE_DIR / 'static_site'),
+            help='Directory to write the exported site to',
+        )
+        parser.add_argument(
+            '--host',
+            default=next((host for host in settings.ALLOWED_HOSTS if host and host != '*'), 'localhost'),
+            help='Host name the pages are rendered for (used in absolute share links)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Render every page even if its source rows are unchanged',
+        )
+
+    def handle(self, *args, **options):
+        self.output = options['output']
+        self.host = options['host']
+        os.makedirs(self.output, exist_ok=True)
+
+        manifest_path = os.path.join(self.output, MANIFEST_NAME)
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as fh:
+                manifest = json.load(fh)
+
+        self.client = Client(HTTP_HOST=self.host)
+        new_manifest = {}
+        rendered = skipped = 0
+
+        # Metrics off: these renders are not traffic
+        with override_settings(PAGE_CACHE_ENABLED=False, ALLOWED_HOSTS=[self.host], METRICS_ENABLED=False):
+            for url, path, sources in self.get_pages():
+                previous = manifest.get(path, {})
+                unchanged = previous.get('sources') == sources and os.path.exists(self.file_path(path))
+                if unchanged and not options['force']:
+                    new_manifest[path] = previous
+                    skipped += 1
+                    continue
+
+                content = self.render(url)
+                content_hash = hashlib.sha256(content).hexdigest()
+                if previous.get('content') != content_hash or not os.path.exists(self.file_path(path)):
+                    self.write(path, content)
+                    self.stdout.write(f'Rendered {url} -> {path}')
+
+                new_manifest[path] = {'url': url, 'sources': sources, 'content': content_hash}
+                rendered += 1
+
+        for path in set(manifest) - set(new_manifest):
+            self.remove(path)
+            self.stdout.write(f'Removed {path}')
+
+        with open(manifest_path, 'w') as fh:
+            json.dump(new_manifest, fh, indent=2, sort_keys=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {len(new_manifest)} pages to {self.output} ({rendered} rendered, {skipped} unchanged)'
+        ))
+
+    # -------------------------------------------------------------------------
+    # Pages
+    # -------------------------------------------------------------------------
+
+    def get_pages(self):
+        """Yield ``(url, output_path, source_digest)`` for every public page"""
+        site = combine(
+            release_token(),
+            rows_digest(SiteSettings.objects.all(), 'updated_at'),
+            rows_digest(Tool.objects.all(), 'updated_at'),
+        )
+        projects = combine(
+            site,
+            rows_digest(Project.objects.all(), 'updated_at'),
+            rows_digest(ProjectCategory.objects.all(), 'name', 'slug', 'order'),
+            rows_digest(Technology.objects.all(), 'name', 'slug', 'category'),
+            rows_digest(Project.technologies.through.objects.all(), 'project_id', 'technology_id'),
+        )
+
+        yield '/', 'index.html', combine(projects, rows_digest(Testimonial.objects.all(), 'updated_at'))
+        yield '/projects/', 'projects/index.html', projects
+
+        published = Article.objects.filter(status='published')
+        article_tags = Article.tags.through.objects.filter(article__status='published')
+        blog = combine(
+            site,
+            rows_digest(published, 'updated_at'),
+            rows_digest(Tag.objects.all(), 'name', 'slug'),
+            rows_digest(article_tags, 'article_id', 'tag_id'),
+        )
+
+        yield from self.paginated_pages('/blog/', 'blog/', published, blog)
+        for tag in Tag.objects.all():
+            yield from self.paginated_pages(f'/blog/tag/{tag.slug}/', f'blog/tag/{tag.slug}/', published.filter(tags=tag), blog)
+
+        for article in published:
+            yield article.get_absolute_url(), f'blog/{article.slug}/index.html', self.article_sources(site, article)
+
+        resume = combine(
+            site,
+            rows_digest(ResumeSettings.objects.all(), 'updated_at'),
+            rows_digest(WorkExperience.objects.all(), 'updated_at'),
+            rows_digest(Education.objects.all(), 'updated_at'),
+            rows_digest(Certification.objects.all(), 'updated_at'),
+            rows_digest(Skill.objects.all(), 'updated_at'),
+        )
+        yield '/resume/', 'resume/index.html', resume
+
+    def paginated_pages(self, url, path, articles, sources):
+        """Follow the keyset cursors the list views emit, in both directions"""
+        yield url, f'{path}index.html', sources
+
+        paginator = KeysetPaginator(articles.only('pk', 'published_at'), ARTICLES_PER_PAGE)
+        page = paginator.get_page()
+        while page.has_next():
+            cursor = page.next_cursor
+            page = paginator.get_page(cursor)
+            yield f'{url}?cursor={cursor}', f'{path}cursor/{cursor}/index.html', sources
+            if page.has_previous():
+                # "Previous" links carry their own tokens
+                previous = page.previous_cursor
+                yield f'{url}?cursor={previous}', f'{path}cursor/{previous}/index.html', sources
+
+    def article_sources(self, site, article):
+        """Digest of an article plus the related articles listed on it"""
+        links = RelatedArticle.objects.filter(article=article)
+        return combine(
+            site,
+            f'{article.pk}:{article.updated_at.isoformat()}',
+            rows_digest(Tag.objects.filter(articles=article), 'name', 'slug'),
+            rows_digest(links, 'related_id', 'related__updated_at'),
+        )
+
+    # -------------------------------------------------------------------------
+    # Rendering and files
+    # -------------------------------------------------------------------------
+
+    def render(self, url):
+        response = self.client.get(url, secure=True)
+        if response.status_code != 200:
+            raise CommandError(f'{url} returned HTTP {response.status_code}')
+
+        content = response.content
+        # A static copy cannot carry a per-visitor token; the form fetches its own
+        content = CSRF_INPUT_RE.sub(b'', content)
+        return content
+
+    def file_path(self, path):
+        return os.path.join(self.output, path)
+
+    def write(self, path, content):
+        variants = {'': content, '.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content)
+
+        target = self.file_path(path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        for suffix, data in variants.items():
+            tmp_path = f'{target}{suffix}.tmp'
+            with open(tmp_path, 'wb') as fh:
+                fh.write(data)
+            os.replace(tmp_path, f'{target}{suffix}')
+
+    def remove(self, path):
+        for suffix in ('', '.gz', '.br'):
+            try:
+                os.remove(f'{self.file_path(path)}{suffix}')
+            except FileNotFoundError:
+                pass
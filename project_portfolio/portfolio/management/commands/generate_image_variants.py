@@ -0,0 +1,55 @@
+"""
+Management command to generate responsive variants of uploaded images.
+Run with: python manage.py generate_image_variants [--force]
+
+New uploads get their variants when they are saved (see signals.py); this
+backfills images uploaded before that, or regenerates everything after the
+breakpoints or encoder settings in portfolio/images.py change (--force).
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from portfolio import images
+from portfolio.cache import bump_groups
+from portfolio.signals import PAGE_GROUPS_BY_MODEL
+
+
+class Command(BaseCommand):
+    help = 'Generates AVIF/WebP/JPEG variants at breakpoint widths for uploaded images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants that are already up to date',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        groups = set()
+        updated = 0
+
+        for label, fields in images.IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            with_uploads = Q()
+            for file_field, variants_field, widths in fields:
+                with_uploads |= ~Q(**{file_field: ''}) & Q(**{f'{file_field}__isnull': False})
+                # Cleared uploads whose variants are still on disk
+                with_uploads |= ~Q(**{variants_field: {}})
+
+            for obj in model.objects.filter(with_uploads).order_by('pk').iterator():
+                changed = images.sync_variants(obj, force=options['force'])
+                if not changed:
+                    continue
+                # Bumps page validators, like any other edit
+                model.objects.filter(pk=obj.pk).update(updated_at=now)
+                groups.update(PAGE_GROUPS_BY_MODEL[model])
+                updated += 1
+                self.stdout.write(f'{label} {obj.pk}: {", ".join(changed)}')
+
+        if groups:
+            bump_groups(*groups)
+        self.stdout.write(self.style.SUCCESS(f'Updated variants of {updated} objects'))
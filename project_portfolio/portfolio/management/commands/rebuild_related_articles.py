@@ -0,0 +1,23 @@
+"""
+Management command to recompute every article's related articles.
+Run with: python manage.py rebuild_related_articles
+
+Saving an article already updates its own neighbours and its score against
+every other article; a periodic rebuild also refreshes the IDF weights of
+pairs that no single edit touched.
+"""
+
+from django.core.management.base import BaseCommand
+
+from portfolio import related_articles
+from portfolio.cache import BLOG, bump_groups
+from portfolio.models import RelatedArticle
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the precomputed related-articles table'
+
+    def handle(self, *args, **options):
+        related_articles.rebuild()
+        bump_groups(BLOG)
+        self.stdout.write(self.style.SUCCESS(f'Stored {RelatedArticle.objects.count()} related-article links'))
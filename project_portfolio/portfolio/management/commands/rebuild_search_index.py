@@ -0,0 +1,29 @@
+"""
+Management command to rebuild the full-text search indexes from scratch.
+Run with: python manage.py rebuild_search_index
+
+Signals keep the indexes in step with admin edits; this is only needed after
+bulk imports or raw SQL changes that bypass them.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from portfolio import article_search, project_search
+from portfolio.models import Article, Project
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search indexes'
+
+    def handle(self, *args, **options):
+        article_search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {Article.objects.count()} articles'))
+
+        if not project_search.is_supported():
+            self.stdout.write(self.style.WARNING('This database has no full-text project search backend'))
+            return
+
+        with transaction.atomic():
+            project_search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {Project.objects.count()} projects'))
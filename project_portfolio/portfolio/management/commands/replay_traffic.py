@@ -0,0 +1,462 @@
+"""
+Management command to load-test the site by replaying traffic.
+Run with: python manage.py replay_traffic [--log access.log] [--rate 50 | --concurrency 8] [--duration 30]
+          [--processes 4] [--gunicorn --workers 3 --worker-class gthread --threads 4 | --url http://host:port]
+
+Requests come from an access log (common/combined format as written by nginx
+and gunicorn, or ALB logs; only GET and HEAD lines are replayed, in order,
+looping) or, without --log, from a synthetic mix over every public view.
+
+By default the requests are sent straight to ``project_portfolio.wsgi.application``
+from a thread pool (--concurrency threads in each of --processes forked
+processes). --gunicorn spawns a local gunicorn with the given worker settings
+and sends real HTTP to it; --url targets a server that is already running.
+
+With --rate the load is open-loop: request i is due at ``start + i / rate``
+and its latency is measured from that moment, so queueing behind a saturated
+server shows up in the percentiles instead of silently lowering the rate.
+Without --rate each thread sends its next request as soon as the previous
+one returns. The report gives throughput, latency percentiles, error rates
+and a per-endpoint breakdown; --output saves it as JSON for comparing runs.
+"""
+
+import http.client
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from django.urls import Resolver404, resolve
+
+from portfolio.query_audit import public_urls
+
+
+LOG_LINE_RE = re.compile(r'"(?P<method>[A-Z]+) (?P<target>\S+) HTTP/[\d.]+"')
+REPLAYED_METHODS = ('GET', 'HEAD')
+
+# Relative weight of each view in the synthetic mix; unlisted views get 1
+SYNTHETIC_WEIGHTS = {
+    'home': 30,
+    'article_detail': 25,
+    'blog_list': 12,
+    'projects_list': 10,
+    'tools_api': 8,
+    'resume': 5,
+    'blog_by_tag': 4,
+    'project_facets_api': 3,
+    'blog_search': 2,
+    'blog_search_api': 1,
+}
+SYNTHETIC_PLAN_SIZE = 1000
+ARTICLE_SAMPLE_SIZE = 50
+
+# Requests carry these so the site behaves as it does behind the load balancer
+FORWARDED_HEADERS = {'X-Forwarded-Proto': 'https'}
+
+
+def endpoint_label(path):
+    try:
+        return resolve(urlsplit(path).path).url_name or 'unnamed'
+    except Resolver404:
+        return 'unmatched'
+
+
+# =============================================================================
+# Request Plans
+# =============================================================================
+
+def plan_from_log(path):
+    """``[(method, path)]`` for every replayable line of an access log"""
+    plan = []
+    with open(path, encoding='utf-8', errors='replace') as handle:
+        for line in handle:
+            match = LOG_LINE_RE.search(line)
+            if not match or match.group('method') not in REPLAYED_METHODS:
+                continue
+            # ALB logs carry absolute URLs
+            parts = urlsplit(match.group('target'))
+            target = parts.path + (f'?{parts.query}' if parts.query else '')
+            plan.append((match.group('method'), target or '/'))
+    return plan
+
+
+def synthetic_plan(seed):
+    """A weighted shuffle of the public URLs, with many article pages"""
+    from portfolio.models import Article
+
+    urls = [url for url in public_urls() if endpoint_label(url) != 'article_detail']
+    urls += [
+        article.get_absolute_url()
+        for article in Article.objects.published().only('slug')[:ARTICLE_SAMPLE_SIZE]
+    ]
+
+    by_label = defaultdict(list)
+    for url in urls:
+        by_label[endpoint_label(url)].append(url)
+
+    rng = random.Random(seed)
+    labels = list(by_label)
+    weights = [SYNTHETIC_WEIGHTS.get(label, 1) for label in labels]
+    return [
+        ('GET', rng.choice(by_label[label]))
+        for label in rng.choices(labels, weights, k=SYNTHETIC_PLAN_SIZE)
+    ]
+
+
+# =============================================================================
+# Targets
+# =============================================================================
+
+class WSGITarget:
+    """Calls the Django WSGI application directly"""
+
+    def __init__(self):
+        from project_portfolio.wsgi import application
+        self.application = application
+        self.host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS and settings.ALLOWED_HOSTS[0] != '*' else 'localhost'
+
+    def request(self, method, path):
+        parts = urlsplit(path)
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': parts.path,
+            'QUERY_STRING': parts.query,
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '443',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': self.host,
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'https',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for name, value in FORWARDED_HEADERS.items():
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+
+        status = []
+        body = self.application(environ, lambda line, headers, exc_info=None: status.append(line))
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        return int(status[0].split()[0])
+
+
+# URL scheme -> (connection class, default port)
+CONNECTION_CLASSES = {
+    'http': (http.client.HTTPConnection, 80),
+    'https': (http.client.HTTPSConnection, 443),
+}
+
+
+class HTTPTarget:
+    """Sends HTTP/1.1 over one keep-alive connection per thread"""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        if parts.scheme not in CONNECTION_CLASSES:
+            raise CommandError(f'--url must be an http:// or https:// URL, not {base_url!r}')
+        self.connection_class, default_port = CONNECTION_CLASSES[parts.scheme]
+        self.host = parts.hostname
+        self.port = parts.port or default_port
+        self.local = threading.local()
+
+    def _connection(self):
+        if getattr(self.local, 'connection', None) is None:
+            self.local.connection = self.connection_class(self.host, self.port, timeout=30)
+        return self.local.connection
+
+    def request(self, method, path):
+        connection = self._connection()
+        try:
+            connection.request(method, path, headers=FORWARDED_HEADERS)
+            response = connection.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self.local.connection = None
+            raise
+
+
+def make_target(url):
+    return HTTPTarget(url) if url else WSGITarget()
+
+
+# =============================================================================
+# Load Generation
+# =============================================================================
+
+def drive(target_url, plan, concurrency, rate, duration, max_requests, offset=0, stride=1):
+    """
+    Replay ``plan`` from ``concurrency`` threads and return the samples as
+    ``[(plan index, status or None, latency seconds)]``.
+
+    Several processes share one schedule by each taking every ``stride``-th
+    request starting at ``offset``.
+    """
+    target = make_target(target_url)
+    counter = itertools.count()
+    lock = threading.Lock()
+    samples = []
+    start = time.perf_counter()
+    deadline = start + duration if duration else None
+
+    def user():
+        local_samples = []
+        while True:
+            with lock:
+                sequence = next(counter) * stride + offset
+            if max_requests is not None and sequence >= max_requests:
+                break
+
+            due = start + sequence / rate if rate else time.perf_counter()
+            if deadline is not None and due >= deadline:
+                break
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+            index = sequence % len(plan)
+            method, path = plan[index]
+            try:
+                status = target.request(method, path)
+            except Exception:
+                status = None
+            local_samples.append((index, status, time.perf_counter() - due))
+        with lock:
+            samples.extend(local_samples)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(user) for _ in range(concurrency)]
+    for future in futures:
+        future.result()
+    return samples
+
+
+def _drive_in_child(arguments):
+    return drive(*arguments)
+
+
+def run_processes(processes, target_url, plan, concurrency, rate, duration, max_requests):
+    # Children are forked; they must not share the parent's database sockets
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    with context.Pool(processes) as pool:
+        jobs = [
+            (target_url, plan, concurrency, rate, duration, max_requests, offset, processes)
+            for offset in range(processes)
+        ]
+        return [sample for samples in pool.map(_drive_in_child, jobs) for sample in samples]
+
+
+# =============================================================================
+# Reports
+# =============================================================================
+
+def summarize(latencies, count, errors, client_errors, elapsed):
+    latencies = sorted(latencies)
+    if len(latencies) >= 2:
+        cut_points = statistics.quantiles(latencies, n=100, method='inclusive')
+    else:
+        cut_points = latencies * 99 or [0.0] * 99
+    return {
+        'requests': count,
+        'throughput_rps': round(count / elapsed, 1) if elapsed else 0.0,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'client_error_rate': round(client_errors / count, 4) if count else 0.0,
+        'p50_ms': round(cut_points[49] * 1000, 2),
+        'p90_ms': round(cut_points[89] * 1000, 2),
+        'p95_ms': round(cut_points[94] * 1000, 2),
+        'p99_ms': round(cut_points[98] * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def build_report(plan, samples, elapsed):
+    labels = [endpoint_label(path) for method, path in plan]
+    grouped = defaultdict(list)
+    for index, status, latency in samples:
+        grouped[labels[index]].append((status, latency))
+
+    def stats(entries):
+        errors = sum(1 for status, latency in entries if status is None or status >= 500)
+        client_errors = sum(1 for status, latency in entries if status is not None and 400 <= status < 500)
+        return summarize([latency for status, latency in entries], len(entries), errors, client_errors, elapsed)
+
+    everything = [(status, latency) for entries in grouped.values() for status, latency in entries]
+    return {
+        'elapsed_s': round(elapsed, 2),
+        'overall': stats(everything),
+        'endpoints': {
+            label: stats(entries)
+            for label, entries in sorted(grouped.items(), key=lambda item: -len(item[1]))
+        },
+    }
+
+
+# =============================================================================
+# Command
+# =============================================================================
+
+class Command(BaseCommand):
+    help = 'Replays an access log or a synthetic traffic mix against the site and reports latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', help='Access log to replay (default: synthetic mix)')
+        parser.add_argument('--rate', type=float, help='Target requests per second (open loop)')
+        parser.add_argument('--concurrency', type=int, default=8, help='Threads per process')
+        parser.add_argument('--processes', type=int, default=1, help='Client processes (in-process mode forks the app)')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run (0 for no limit)')
+        parser.add_argument('--requests', type=int, help='Stop after this many requests')
+        parser.add_argument('--seed', type=int, default=42, help='Seed for the synthetic mix')
+
+        parser.add_argument('--url', help='Send HTTP to an already running server, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--gunicorn', action='store_true', help='Spawn a local gunicorn and send HTTP to it')
+        parser.add_argument('--workers', type=int, default=3, help='gunicorn --workers')
+        parser.add_argument('--worker-class', default='sync', help='gunicorn --worker-class')
+        parser.add_argument('--threads', type=int, default=1, help='gunicorn --threads')
+
+        parser.add_argument('--output', help='Write the report as JSON to this file')
+
+    def handle(self, *args, **options):
+        if not options['duration'] and options['requests'] is None:
+            raise CommandError('Give --duration or --requests')
+        if options['rate'] is not None and options['rate'] <= 0:
+            raise CommandError('--rate must be positive')
+
+        plan = plan_from_log(options['log']) if options['log'] else synthetic_plan(options['seed'])
+        if not plan:
+            raise CommandError('No replayable requests found')
+
+        server = None
+        target_url = options['url']
+        if target_url:
+            HTTPTarget(target_url)  # Reject a bad --url before spawning anything
+        if options['gunicorn']:
+            server, target_url = self.start_gunicorn(options)
+
+        mode = f'gunicorn ({options["workers"]} x {options["worker_class"]}, {options["threads"]} threads)' if server else (target_url or 'in-process WSGI')
+        load = f'{options["rate"]:g} req/s' if options['rate'] else 'closed loop'
+        self.stdout.write(
+            f'Replaying {len(plan)} requests against {mode}: {load}, '
+            f'{options["processes"]} x {options["concurrency"]} clients'
+        )
+
+        try:
+            start = time.perf_counter()
+            # Synthetic traffic must not reach the site's /metrics; the in-process app is forked
+            # from this process, a spawned gunicorn gets METRICS_ENABLED through its environment
+            with override_settings(METRICS_ENABLED=False):
+                if options['processes'] > 1:
+                    samples = run_processes(
+                        options['processes'], target_url, plan, options['concurrency'],
+                        options['rate'], options['duration'], options['requests'],
+                    )
+                else:
+                    samples = drive(
+                        target_url, plan, options['concurrency'],
+                        options['rate'], options['duration'], options['requests'],
+                    )
+            elapsed = time.perf_counter() - start
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=30)
+
+        if not samples:
+            raise CommandError('No requests were sent')
+
+        report = build_report(plan, samples, elapsed)
+        report['config'] = {
+            key: options[key] for key in (
+                'log', 'rate', 'concurrency', 'processes', 'duration', 'requests', 'url',
+                'gunicorn', 'workers', 'worker_class', 'threads',
+            )
+        }
+        self.print_report(report)
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+            self.stdout.write(f'Report written to {options["output"]}')
+
+    def start_gunicorn(self, options):
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            raise CommandError('gunicorn is not installed')
+
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'gunicorn',
+                '--bind', f'127.0.0.1:{port}',
+                '--workers', str(options['workers']),
+                '--worker-class', options['worker_class'],
+                '--threads', str(options['threads']),
+                '--log-level', 'warning',
+                'project_portfolio.wsgi:application',
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'METRICS_ENABLED': 'False'},
+        )
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'gunicorn exited with status {server.returncode}')
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return server, f'http://127.0.0.1:{port}'
+            except OSError:
+                time.sleep(0.2)
+
+        server.terminate()
+        raise CommandError('gunicorn did not start listening within 30 seconds')
+
+    def print_report(self, report):
+        overall = report['overall']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\n{overall["requests"]} requests in {report["elapsed_s"]} s: {overall["throughput_rps"]} req/s, '
+            f'{overall["error_rate"]:.2%} errors, {overall["client_error_rate"]:.2%} 4xx'
+        ))
+        self.stdout.write(
+            f'p50 {overall["p50_ms"]} ms, p90 {overall["p90_ms"]} ms, p95 {overall["p95_ms"]} ms, '
+            f'p99 {overall["p99_ms"]} ms, max {overall["max_ms"]} ms\n'
+        )
+
+        self.stdout.write(
+            f'{"endpoint":<22} {"requests":>9} {"req/s":>8} {"errors":>8} '
+            f'{"p50":>8} {"p95":>8} {"p99":>8} {"max":>9}'
+        )
+        for label, stats in report['endpoints'].items():
+            line = (
+                f'{label:<22} {stats["requests"]:>9} {stats["throughput_rps"]:>8} {stats["error_rate"]:>8.2%} '
+                f'{stats["p50_ms"]:>8} {stats["p95_ms"]:>8} {stats["p99_ms"]:>8} {stats["max_ms"]:>9}'
+            )
+            self.stdout.write(self.style.ERROR(line) if stats['error_rate'] else line)
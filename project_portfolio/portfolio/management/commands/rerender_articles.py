@@ -0,0 +1,58 @@
+"""
+Management command to re-render stored article HTML.
+Run with: python manage.py rerender_articles [--force]
+
+Only articles whose content hash no longer matches (because the content was
+changed outside ``save()`` or ``rendering.RENDERER_VERSION`` was bumped) are
+rendered again, unless --force is given.
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from portfolio.cache import BLOG, bump_groups
+from portfolio.models import Article
+
+
+RENDERED_FIELDS = ['content_html', 'toc', 'auto_excerpt', 'reading_time', 'content_hash', 'updated_at']
+BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = 'Re-renders the stored HTML, table of contents and excerpt of articles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Render every article even if its content hash is current',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch = []
+        rendered = total = 0
+
+        for article in Article.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+            total += 1
+            if not article.render_content(force=options['force']):
+                continue
+            # Bumps page validators and the static export manifest
+            article.updated_at = now
+            batch.append(article)
+            if len(batch) >= BATCH_SIZE:
+                rendered += self.flush(batch)
+
+        rendered += self.flush(batch)
+
+        if rendered:
+            bump_groups(BLOG)
+        self.stdout.write(self.style.SUCCESS(f'Re-rendered {rendered} of {total} articles'))
+
+    def flush(self, batch):
+        # bulk_update skips save(), so search and related-article signals do
+        # not fire for what is only a change of rendered output.
+        Article.objects.bulk_update(batch, RENDERED_FIELDS)
+        count = len(batch)
+        batch.clear()
+        return count
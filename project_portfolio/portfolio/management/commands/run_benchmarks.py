@@ -0,0 +1,189 @@
+"""
+Management command to benchmark every public view at several data sizes.
+Run with: python manage.py run_benchmarks [--sizes 100,1000] [--requests 50] [--save-baseline]
+
+For each size a fresh test database is created and filled with
+``seed_data --scale <size>``, then every public URL is requested through the
+Django test client with the full-page cache off, in-memory values
+rechecked on every request and the resume's cached fragment invalidated
+before each request: a few warm-up requests, --requests timed ones
+(p50/p95/p99), one under the query audit and one under tracemalloc for the
+peak memory allocated while serving it.
+
+Results are compared with the baseline JSON (--baseline, by default
+benchmarks/baseline.json); a view regresses when its p95 or allocated memory
+grows by more than --tolerance, or it runs more queries. --save-baseline
+writes the current results as the new baseline instead of failing.
+"""
+
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import resolve
+
+from portfolio.cache import RESUME, bump_groups
+from portfolio.query_audit import QueryAudit, public_urls
+
+
+WARMUP_REQUESTS = 3
+# URL name -> groups bumped before every request, so template fragments cached
+# outside the page cache are rendered and timed too
+FRAGMENT_GROUPS = {
+    'resume': (RESUME,),
+}
+# p95 changes smaller than this are noise, whatever the ratio
+MIN_LATENCY_DELTA_MS = 1.0
+
+
+def url_label(url):
+    """Stable name for a URL across runs: its URL name plus the query keys"""
+    parts = urlsplit(url)
+    label = resolve(parts.path).url_name
+    keys = sorted(parse_qs(parts.query))
+    return f'{label}?{",".join(keys)}' if keys else label
+
+
+def percentile(cut_points, value):
+    return round(cut_points[value - 1], 3)
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks every public view at several data sizes against a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000', help='Comma-separated seed_data scales')
+        parser.add_argument('--requests', type=int, default=50, help='Timed requests per URL')
+        parser.add_argument(
+            '--baseline',
+            default=str(settings.BASE_DIR / 'benchmarks' / 'baseline.json'),
+            help='Baseline JSON file',
+        )
+        parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Allowed relative growth of p95 latency and allocated memory',
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Random seed passed to seed_data')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        if options['requests'] < 2:
+            raise CommandError('--requests must be at least 2')
+
+        results = {}
+        for size in sizes:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'Seeding scale {size}'))
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            # A fresh cache per size; in-memory values reload as soon as seeding bumps their group
+            caches = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'benchmarks-{size}'}}
+            try:
+                with override_settings(
+                    PAGE_CACHE_ENABLED=False, CACHES=caches, ALLOWED_HOSTS=['testserver'],
+                    LOCAL_CACHE_RECHECK_SECONDS=0, QUERY_AUDIT_ENABLED=False, PROFILING_SAMPLE_RATE=0,
+                    METRICS_ENABLED=False,
+                ):
+                    call_command('seed_data', scale=size, seed=options['seed'], verbosity=0)
+                    results[str(size)] = self.run_size(options['requests'])
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+            return
+
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        if not baseline:
+            self.stdout.write(self.style.WARNING(f'No baseline at {baseline_path}; run with --save-baseline'))
+
+        regressions = self.report(results, baseline, options['tolerance'])
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(regression)
+            raise CommandError(f'{len(regressions)} benchmark regressions')
+
+    def run_size(self, requests):
+        client = Client()
+        results = {}
+
+        for url in public_urls():
+            groups = FRAGMENT_GROUPS.get(resolve(urlsplit(url).path).url_name, ())
+            for _ in range(WARMUP_REQUESTS):
+                client.get(url)
+
+            timings = []
+            for _ in range(requests):
+                bump_groups(*groups)
+                start = time.perf_counter()
+                client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            bump_groups(*groups)
+            audit = QueryAudit(locate=False)
+            with connection.execute_wrapper(audit):
+                client.get(url)
+
+            bump_groups(*groups)
+            tracemalloc.start()
+            client.get(url)
+            allocated = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            cut_points = statistics.quantiles(timings, n=100, method='inclusive')
+            results[url_label(url)] = {
+                'url': url,
+                'p50_ms': percentile(cut_points, 50),
+                'p95_ms': percentile(cut_points, 95),
+                'p99_ms': percentile(cut_points, 99),
+                'queries': audit.count,
+                'allocated_kb': round(allocated / 1024, 1),
+            }
+        return results
+
+    def report(self, results, baseline, tolerance):
+        regressions = []
+        header = f'{"view":<32} {"p50":>8} {"p95":>8} {"p99":>8} {"queries":>8} {"alloc KB":>10}  vs baseline'
+
+        for size, views in results.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\nScale {size}'))
+            self.stdout.write(header)
+            for label, result in views.items():
+                base = baseline.get(size, {}).get(label)
+                problems = self.compare(result, base, tolerance) if base else []
+                regressions.extend(f'scale {size} {label}: {problem}' for problem in problems)
+
+                if base is None:
+                    note = 'new'
+                else:
+                    note = f'p95 {result["p95_ms"] - base["p95_ms"]:+.2f} ms'
+                line = (
+                    f'{label:<32} {result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} {result["p99_ms"]:>8.2f} '
+                    f'{result["queries"]:>8} {result["allocated_kb"]:>10.1f}  {note}'
+                )
+                self.stdout.write(self.style.ERROR(line) if problems else line)
+
+        return regressions
+
+    def compare(self, result, base, tolerance):
+        problems = []
+        p95_delta = result['p95_ms'] - base['p95_ms']
+        if result['p95_ms'] > base['p95_ms'] * (1 + tolerance) and p95_delta > MIN_LATENCY_DELTA_MS:
+            problems.append(f'p95 {base["p95_ms"]:.2f} -> {result["p95_ms"]:.2f} ms')
+        if result['queries'] > base['queries']:
+            problems.append(f'queries {base["queries"]} -> {result["queries"]}')
+        if result['allocated_kb'] > base['allocated_kb'] * (1 + tolerance):
+            problems.append(f'allocated {base["allocated_kb"]:.1f} -> {result["allocated_kb"]:.1f} KB')
+        return problems
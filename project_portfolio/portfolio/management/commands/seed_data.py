@@ -0,0 +1,256 @@
+"""
+Management command to generate synthetic portfolio content in bulk.
+Run with: python manage.py seed_data [--scale 1000] [--articles N] [--projects N] [--clear]
+
+Everything is written with ``bulk_create``, so no signals fire; the command
+renders article bodies up front and rebuilds the search indexes, related
+articles and technology buckets once at the end. Output is deterministic for
+a given --seed. Generated rows use slugs starting with "seed-" (and a
+"Seed ..." testimonial company) so --clear removes only them.
+"""
+
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from portfolio import article_search, project_search, related_articles
+from portfolio.cache import PAGE_GROUPS, TOOLS, bump_groups
+from portfolio.models import (
+    Article, Project, ProjectCategory, Tag, Technology, Testimonial,
+)
+
+
+SLUG_PREFIX = 'seed-'
+BATCH_SIZE = 500
+
+WORDS = (
+    'cache deploy cluster service container pipeline latency request query index '
+    'database schema migration template render worker queue metric trace log alert '
+    'network proxy balancer gateway endpoint payload token session cookie header '
+    'release rollback canary feature branch commit review merge build artifact image '
+    'registry volume snapshot backup replica shard partition throughput bottleneck '
+    'profile benchmark regression baseline budget capacity scaling autoscaler node '
+    'kernel thread process memory allocation garbage buffer stream socket timeout '
+    'retry backoff circuit breaker idempotent transaction isolation lock contention '
+    'python django postgres redis nginx docker kubernetes terraform ansible linux '
+    'frontend backend api client server browser asset bundle compression static '
+    'the a an of to in on for with and or but when while because after before '
+    'we you it this that these those our your their is are was were be been '
+    'fast slow small large simple careful reliable stable secure modern clean'
+).split()
+
+TECHNOLOGY_CATEGORIES = ('frontend', 'backend', 'devops', 'database', 'other')
+
+
+# =============================================================================
+# Text Generation
+# =============================================================================
+
+class TextGenerator:
+    """Deterministic filler text with the shape of real posts"""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def words(self, count):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(count))
+
+    def title(self, low=3, high=8):
+        return self.words(self.rng.randint(low, high)).capitalize()
+
+    def sentence(self):
+        return self.words(self.rng.randint(8, 24)).capitalize() + '.'
+
+    def paragraph(self, low=3, high=7):
+        return ' '.join(self.sentence() for _ in range(self.rng.randint(low, high)))
+
+    def markdown(self, target_words):
+        """A Markdown article of roughly ``target_words`` words with headings, lists and code"""
+        blocks = []
+        written = 0
+        while written < target_words:
+            blocks.append(f'## {self.title(2, 5)}')
+            for _ in range(self.rng.randint(2, 4)):
+                paragraph = self.paragraph()
+                blocks.append(paragraph)
+                written += paragraph.count(' ') + 1
+            roll = self.rng.random()
+            if roll < 0.4:
+                blocks.append('\n'.join(f'- {self.sentence()}' for _ in range(self.rng.randint(3, 6))))
+            elif roll < 0.6:
+                lines = '\n'.join(f'{self.rng.choice(WORDS)} = {self.rng.randint(1, 999)}' for _ in range(self.rng.randint(3, 10)))
+                blocks.append(f'```python\n{lines}\n```')
+        return '\n\n'.join(blocks)
+
+
+def zipf_sample(rng, population, low, high):
+    """Pick between ``low`` and ``high`` distinct items, favouring the head of ``population``"""
+    count = min(rng.randint(low, high), len(population))
+    weights = [1 / (rank + 1) for rank in range(len(population))]
+    chosen = set()
+    while len(chosen) < count:
+        chosen.add(rng.choices(range(len(population)), weights)[0])
+    return [population[index] for index in sorted(chosen)]
+
+
+# =============================================================================
+# Command
+# =============================================================================
+
+class Command(BaseCommand):
+    help = 'Generates synthetic projects, articles, tags and testimonials with bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=100, help='Number of articles; other counts are derived from it')
+        parser.add_argument('--articles', type=int, help='Number of articles (default: --scale)')
+        parser.add_argument('--projects', type=int, help='Number of projects (default: scale / 2)')
+        parser.add_argument('--tags', type=int, help='Number of tags (default: scale / 10, at least 10)')
+        parser.add_argument('--technologies', type=int, help='Number of technologies (default: scale / 20, at least 15)')
+        parser.add_argument('--categories', type=int, help='Number of project categories (default: 6)')
+        parser.add_argument('--testimonials', type=int, help='Number of testimonials (default: scale / 50, at least 6)')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--clear', action='store_true', help='Delete previously seeded rows first')
+
+    def handle(self, *args, **options):
+        scale = options['scale']
+        counts = {
+            'articles': options['articles'] if options['articles'] is not None else scale,
+            'projects': options['projects'] if options['projects'] is not None else max(1, scale // 2),
+            'tags': options['tags'] if options['tags'] is not None else max(10, scale // 10),
+            'technologies': options['technologies'] if options['technologies'] is not None else max(15, scale // 20),
+            'categories': options['categories'] if options['categories'] is not None else 6,
+            'testimonials': options['testimonials'] if options['testimonials'] is not None else max(6, scale // 50),
+        }
+
+        self.rng = random.Random(options['seed'])
+        self.text = TextGenerator(self.rng)
+        self.now = timezone.now()
+
+        with transaction.atomic():
+            if options['clear']:
+                self.clear()
+            categories = self.create_categories(counts['categories'])
+            technologies = self.create_technologies(counts['technologies'])
+            tags = self.create_tags(counts['tags'])
+            self.create_projects(counts['projects'], categories, technologies)
+            self.create_articles(counts['articles'], tags)
+            self.create_testimonials(counts['testimonials'])
+
+        # bulk_create skips the signals that keep these in sync
+        article_search.rebuild_index()
+        if project_search.is_supported():
+            with transaction.atomic():
+                project_search.rebuild_index()
+        related_articles.rebuild()
+        bump_groups(*PAGE_GROUPS, TOOLS)
+
+        if options['verbosity']:
+            summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+            self.stdout.write(self.style.SUCCESS(f'Seeded {summary}'))
+
+    def clear(self):
+        seeded = {'slug__startswith': SLUG_PREFIX}
+        Article.objects.filter(**seeded).delete()
+        Project.objects.filter(**seeded).delete()
+        Tag.objects.filter(**seeded).delete()
+        Technology.objects.filter(**seeded).delete()
+        ProjectCategory.objects.filter(**seeded).delete()
+        Testimonial.objects.filter(company__startswith='Seed ').delete()
+
+    def _unique_slugs(self, model, count, kind):
+        """``count`` slugs for ``kind`` that do not collide with earlier seeds"""
+        offset = model.objects.filter(slug__startswith=f'{SLUG_PREFIX}{kind}-').count()
+        return [f'{SLUG_PREFIX}{kind}-{offset + index}' for index in range(count)]
+
+    def create_categories(self, count):
+        categories = [
+            ProjectCategory(name=self.text.title(1, 2), slug=slug, order=index)
+            for index, slug in enumerate(self._unique_slugs(ProjectCategory, count, 'category'))
+        ]
+        return ProjectCategory.objects.bulk_create(categories, batch_size=BATCH_SIZE)
+
+    def create_technologies(self, count):
+        technologies = [
+            Technology(name=f'{self.text.title(1, 2)} {slug.rsplit("-", 1)[1]}', slug=slug,
+                       category=self.rng.choice(TECHNOLOGY_CATEGORIES))
+            for slug in self._unique_slugs(Technology, count, 'tech')
+        ]
+        return Technology.objects.bulk_create(technologies, batch_size=BATCH_SIZE)
+
+    def create_tags(self, count):
+        # Tag names are unique, so the slug number is part of the name
+        tags = [
+            Tag(name=f'{self.rng.choice(WORDS).capitalize()} {slug.rsplit("-", 1)[1]}', slug=slug)
+            for slug in self._unique_slugs(Tag, count, 'tag')
+        ]
+        return Tag.objects.bulk_create(tags, batch_size=BATCH_SIZE)
+
+    def create_projects(self, count, categories, technologies):
+        projects = []
+        for index, slug in enumerate(self._unique_slugs(Project, count, 'project')):
+            category = self.rng.choice(categories) if categories else None
+            projects.append(Project(
+                title=self.text.title(),
+                slug=slug,
+                project_category=category,
+                category=category.name if category else '',
+                description=self.text.paragraph(2, 6),
+                github_url=f'https://github.com/example/{slug}',
+                is_featured=self.rng.random() < 0.1,
+                show_on_homepage=index < 6,
+                order=index,
+            ))
+        projects = Project.objects.bulk_create(projects, batch_size=BATCH_SIZE)
+
+        through = Project.technologies.through
+        links = []
+        for project in projects:
+            buckets = {}
+            for technology in zipf_sample(self.rng, technologies, 3, 8):
+                links.append(through(project_id=project.pk, technology_id=technology.pk))
+                buckets.setdefault(technology.category, []).append({'name': technology.name, 'slug': technology.slug})
+            project.technology_buckets = buckets
+        through.objects.bulk_create(links, batch_size=BATCH_SIZE)
+        Project.objects.bulk_update(projects, ['technology_buckets'], batch_size=BATCH_SIZE)
+
+    def create_articles(self, count, tags):
+        articles = []
+        for slug in self._unique_slugs(Article, count, 'article'):
+            published = self.rng.random() < 0.9
+            article = Article(
+                title=self.text.title(4, 10),
+                slug=slug,
+                excerpt=self.text.sentence() if self.rng.random() < 0.5 else '',
+                content=self.text.markdown(int(self.rng.lognormvariate(7, 0.4))),
+                status='published' if published else 'draft',
+                is_featured=published and self.rng.random() < 0.05,
+                published_at=self.now - timedelta(minutes=self.rng.randint(0, 3 * 365 * 24 * 60)) if published else None,
+            )
+            # save() is skipped, so render here
+            article.render_content()
+            articles.append(article)
+        articles = Article.objects.bulk_create(articles, batch_size=BATCH_SIZE)
+
+        through = Article.tags.through
+        through.objects.bulk_create([
+            through(article_id=article.pk, tag_id=tag.pk)
+            for article in articles
+            for tag in zipf_sample(self.rng, tags, 1, 5)
+        ], batch_size=BATCH_SIZE)
+
+    def create_testimonials(self, count):
+        Testimonial.objects.bulk_create([
+            Testimonial(
+                name=self.text.title(2, 2),
+                role=self.text.title(1, 3),
+                company=f'Seed {self.rng.choice(WORDS).capitalize()} Labs',
+                quote=self.text.paragraph(1, 3),
+                is_featured=self.rng.random() < 0.5,
+                show_on_homepage=self.rng.random() < 0.5,
+                order=index,
+            )
+            for index in range(count)
+        ], batch_size=BATCH_SIZE)
@@ -0,0 +1,51 @@
+"""
+Management command to deliver queued email from the outbox.
+Run with: python manage.py send_outbox [--loop] [--interval 5] [--batch-size 50]
+
+Without --loop the command sends everything that is due and exits, which
+suits cron. With --loop it keeps polling every --interval seconds until it
+receives SIGTERM or SIGINT, finishing the batch in hand first. Several
+workers may run at once; see portfolio/outbox.py for how rows are claimed.
+"""
+
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from portfolio import outbox
+from portfolio.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    help = 'Sends due emails from the outbox, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling until stopped')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop')
+        parser.add_argument('--batch-size', type=int, help='Emails claimed per batch (default: OUTBOX_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if not options['loop']:
+            self.drain(options['batch_size'])
+            return
+
+        stopping = threading.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stopping.set())
+
+        self.stdout.write(f'Polling the outbox every {options["interval"]}s')
+        while not stopping.is_set():
+            close_old_connections()
+            self.drain(options['batch_size'])
+            stopping.wait(options['interval'])
+        self.stdout.write('Stopped')
+
+    def drain(self, batch_size):
+        sent, failed = outbox.drain(batch_size=batch_size)
+        if sent or failed or self.verbosity > 1:
+            dead = OutboxEmail.objects.filter(status=outbox.DEAD).count()
+            style = self.style.WARNING if failed else self.style.SUCCESS
+            self.stdout.write(style(f'Sent {sent}, failed {failed} ({dead} dead letters in total)'))
@@ -0,0 +1,332 @@
+"""
+Metrics - Per-view request, database, template and cache metrics for Prometheus
+
+Each worker records into plain dicts in its own memory (a few dict updates
+per request), and writes a snapshot to ``METRICS_DIR/metrics-<pid>-<ns>.json``
+at most every ``METRICS_FLUSH_SECONDS``. ``/metrics`` merges the snapshots of
+every worker, past and present, and renders the Prometheus text format, so
+the numbers are aggregated across gunicorn workers and survive worker
+restarts. Snapshots of workers that have exited are folded into one
+``retired.json`` total and deleted, so the directory does not grow with
+every restart. Snapshots of other workers can lag by one flush interval;
+empty ``METRICS_DIR`` on deploy, as counters only ever add up.
+"""
+
+import bisect
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+try:
+    import fcntl
+except ImportError:  # Windows: exited workers' snapshots are kept, not folded
+    fcntl = None
+
+from django.conf import settings
+
+
+# =============================================================================
+# Metric Definitions
+# =============================================================================
+
+COUNTER = 'counter'
+HISTOGRAM = 'histogram'
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Clients choose the method, so any other verb is recorded as 'other' to keep the series bounded
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+# name -> (type, help, label names, buckets)
+METRICS = {
+    'portfolio_http_requests_total': (
+        COUNTER, 'Requests by view, method and status', ('view', 'method', 'status'), None,
+    ),
+    'portfolio_http_request_duration_seconds': (
+        HISTOGRAM, 'Request duration by view', ('view',), DURATION_BUCKETS,
+    ),
+    'portfolio_http_response_size_bytes': (
+        HISTOGRAM, 'Response body size by view', ('view',), SIZE_BUCKETS,
+    ),
+    'portfolio_db_queries_total': (
+        COUNTER, 'Database queries by view', ('view',), None,
+    ),
+    'portfolio_db_query_seconds_total': (
+        COUNTER, 'Time spent in database queries by view', ('view',), None,
+    ),
+    'portfolio_template_render_seconds_total': (
+        COUNTER, 'Time spent rendering templates by view', ('view',), None,
+    ),
+    'portfolio_cache_requests_total': (
+        COUNTER, 'Application cache lookups by cache and result', ('cache', 'result'), None,
+    ),
+    'portfolio_rate_limited_total': (
+        COUNTER, 'Requests rejected by a rate limit or collapsed as duplicates', ('limit',), None,
+    ),
+}
+
+
+# =============================================================================
+# Recording
+# =============================================================================
+
+class Registry:
+    """This worker's metric values, keyed by ``(name, label values)``"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)
+        # [count per bucket..., count in +Inf, sum]
+        self.histograms = {}
+        self.flushed_at = time.monotonic()
+        self.file_id = f'{os.getpid()}-{time.time_ns()}'
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            # A new id, so a recycled pid never overwrites a dead worker's totals
+            self.file_id = f'{os.getpid()}-{time.time_ns()}'
+
+    def inc(self, name, labels, value=1):
+        with self.lock:
+            self.counters[name, labels] += value
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][3]
+        index = bisect.bisect_left(buckets, value)
+        with self.lock:
+            series = self.histograms.get((name, labels))
+            if series is None:
+                series = self.histograms[name, labels] = [0] * (len(buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), list(series)] for (name, labels), series in self.histograms.items()],
+            }
+
+
+registry = Registry()
+
+# Values inherited from the master process belong to the master
+os.register_at_fork(after_in_child=registry.reset)
+
+
+class RequestStats:
+    """Database and template time of the request being handled on this thread"""
+
+    __slots__ = ('queries', 'query_seconds', 'template_seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.template_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - start
+
+
+_local = threading.local()
+
+
+def start_request():
+    _local.stats = stats = RequestStats()
+    return stats
+
+
+def end_request():
+    _local.stats = None
+
+
+def add_template_time(seconds):
+    stats = getattr(_local, 'stats', None)
+    if stats is not None:
+        stats.template_seconds += seconds
+
+
+def count_cache(cache_name, hit):
+    if settings.METRICS_ENABLED:
+        registry.inc('portfolio_cache_requests_total', (cache_name, 'hit' if hit else 'miss'))
+
+
+def count_rate_limited(limit):
+    if settings.METRICS_ENABLED:
+        registry.inc('portfolio_rate_limited_total', (limit,))
+
+
+def record_request(view, method, status, seconds, size, stats):
+    view_labels = (view,)
+    method = method if method in HTTP_METHODS else 'other'
+    registry.inc('portfolio_http_requests_total', (view, method, str(status)))
+    registry.observe('portfolio_http_request_duration_seconds', view_labels, seconds)
+    registry.observe('portfolio_http_response_size_bytes', view_labels, size)
+    registry.inc('portfolio_db_queries_total', view_labels, stats.queries)
+    registry.inc('portfolio_db_query_seconds_total', view_labels, stats.query_seconds)
+    registry.inc('portfolio_template_render_seconds_total', view_labels, stats.template_seconds)
+
+    if time.monotonic() - registry.flushed_at >= settings.METRICS_FLUSH_SECONDS:
+        flush()
+
+
+# =============================================================================
+# Multiprocess Store
+# =============================================================================
+
+def flush():
+    """Write this worker's snapshot; readers never see a partial file"""
+    registry.flushed_at = time.monotonic()
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = os.path.join(settings.METRICS_DIR, f'metrics-{registry.file_id}.json')
+    with open(f'{path}.tmp', 'w') as handle:
+        json.dump(registry.snapshot(), handle)
+    os.replace(f'{path}.tmp', path)
+
+
+def _read(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return None
+
+
+def _add(counters, histograms, snapshot):
+    for name, labels, value in snapshot['counters']:
+        counters[name, tuple(labels)] += value
+    for name, labels, series in snapshot['histograms']:
+        merged = histograms.setdefault((name, tuple(labels)), [0] * len(series))
+        for index, value in enumerate(series):
+            merged[index] += value
+
+
+def _is_running(file_id):
+    pid = int(file_id.split('-', 1)[0])
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _file_id(path):
+    return os.path.basename(path)[len('metrics-'):-len('.json')]
+
+
+def _write_json(path, data):
+    with open(f'{path}.tmp', 'w') as handle:
+        json.dump(data, handle)
+    os.replace(f'{path}.tmp', path)
+
+
+def _retire(paths, retired_path):
+    """Fold the snapshots at ``paths`` into retired.json and delete them; hold the lock exclusively"""
+    retired = _read(retired_path) or {'counters': [], 'histograms': [], 'merged': []}
+    counters = defaultdict(float)
+    histograms = {}
+    _add(counters, histograms, retired)
+    # Ids folded in but maybe not yet deleted, so a crash cannot count a file twice
+    merged = set(retired.get('merged', ()))
+    for path in paths:
+        snapshot = _read(path)
+        if snapshot is not None and _file_id(path) not in merged:
+            _add(counters, histograms, snapshot)
+            merged.add(_file_id(path))
+
+    retired = {
+        'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+        'histograms': [[name, list(labels), series] for (name, labels), series in histograms.items()],
+        'merged': sorted(merged),
+    }
+    _write_json(retired_path, retired)
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    retired['merged'] = []
+    _write_json(retired_path, retired)
+
+
+def collect():
+    """Sum the snapshots of every worker that has written one"""
+    flush()
+
+    retired_path = os.path.join(settings.METRICS_DIR, 'retired.json')
+    with open(os.path.join(settings.METRICS_DIR, 'retired.lock'), 'a') as lock_file:
+        paths = glob.glob(os.path.join(settings.METRICS_DIR, 'metrics-*.json'))
+        if fcntl is not None:
+            # Exclusive only while folding, so scrapes never see a file both retired and live
+            exited = [path for path in paths if not _is_running(_file_id(path))]
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exited else fcntl.LOCK_SH)
+            if exited:
+                _retire(exited, retired_path)
+                paths = [path for path in paths if path not in exited]
+
+        counters = defaultdict(float)
+        histograms = {}
+        for path in [retired_path, *paths]:
+            snapshot = _read(path)
+            if snapshot is not None:
+                _add(counters, histograms, snapshot)
+
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def render_text():
+    """All metrics in the Prometheus text exposition format (0.0.4)"""
+    counters, histograms = collect()
+    lines = []
+
+    for name, (kind, help_text, label_names, buckets) in METRICS.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+
+        if kind == COUNTER:
+            for (series_name, labels), value in sorted(counters.items()):
+                if series_name == name:
+                    lines.append(f'{name}{_format_labels(label_names, labels)} {_format_value(value)}')
+            continue
+
+        for (series_name, labels), series in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), series[:-1]):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{_format_labels(label_names, labels, [("le", bound)])} {cumulative}'
+                )
+            lines.append(f'{name}_sum{_format_labels(label_names, labels)} {_format_value(series[-1])}')
+            lines.append(f'{name}_count{_format_labels(label_names, labels)} {cumulative}')
+
+    return '\n'.join(lines) + '\n'
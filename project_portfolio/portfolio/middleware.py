@@ -0,0 +1,125 @@
+"""
+Portfolio middleware
+"""
+
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from . import metrics, profiling
+from .query_audit import QueryAudit, QueryBudgetExceeded, logger, query_budget
+
+
+class MetricsMiddleware:
+    """
+    Record duration, size, status, database and template time per URL name.
+
+    Requests that match no URL pattern (static files, 404s) are recorded
+    under ``unmatched``.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        stats = metrics.start_request()
+        try:
+            with connection.execute_wrapper(stats):
+                response = self.get_response(request)
+        finally:
+            metrics.end_request()
+
+        if response.streaming:
+            size = int(response.get('Content-Length') or 0)
+        else:
+            size = len(response.content)
+
+        match = request.resolver_match
+        metrics.record_request(
+            match.url_name if match and match.url_name else 'unmatched',
+            request.method,
+            response.status_code,
+            time.perf_counter() - start,
+            size,
+            stats,
+        )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile sampled requests and requests carrying a signed ``X-Profile`` header.
+
+    Header-triggered requests bypass the page cache so the profile shows the
+    full render; the result is stored as a ``RequestProfile``. Only one request
+    per worker is profiled at a time; others are served unprofiled meanwhile.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = profiling.profile_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        with profiling.exclusive() as acquired:
+            if not acquired:
+                # Another thread of this worker is being profiled
+                return self.get_response(request)
+
+            if trigger == profiling.SIGNED_HEADER:
+                request.bypass_page_cache = True
+
+            with profiling.RequestProfiler() as profiler:
+                response = self.get_response(request)
+
+        profile = profiling.save_profile(request, response, trigger, profiler)
+        response['X-Profile-Id'] = str(profile.pk)
+        return response
+
+
+class QueryAuditMiddleware:
+    """
+    Count and fingerprint the queries of every request (development only).
+
+    Repeated fingerprints are logged as N+1 suspects with their call sites,
+    and a request over its ``QUERY_BUDGETS`` entry is logged as an error, or
+    raises ``QueryBudgetExceeded`` when ``QUERY_AUDIT_STRICT`` is on so test
+    runs and ``check_query_budgets`` fail. The count is also sent back in an
+    ``X-Query-Count`` header.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_AUDIT_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        audit = QueryAudit()
+        with connection.execute_wrapper(audit):
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(audit.count)
+
+        for key, count, sites in audit.repeated(settings.QUERY_AUDIT_REPEAT_THRESHOLD):
+            logger.warning(
+                'Possible N+1 on %s: %d x %s\n%s',
+                request.path, count, key,
+                '\n'.join(f'    {times} x {site}' for site, times in sites),
+            )
+
+        match = request.resolver_match
+        budget = query_budget(match.url_name) if match else None
+        if budget is not None and audit.count > budget:
+            message = f'{match.url_name} ran {audit.count} queries, budget is {budget} ({request.get_full_path()})'
+            if settings.QUERY_AUDIT_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.error(message)
+
+        return response
@@ -0,0 +1,42 @@
+# Generated by Django 4.2 on 2026-10-17 11:40
+
+from django.db import migrations
+
+
+# Schema only: fill it with `python manage.py rebuild_search_index`, so this
+# migration does not depend on how the live code builds search documents
+FTS_TABLE = 'portfolio_project_fts'
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE portfolio_project ADD COLUMN search_vector tsvector')
+        schema_editor.execute(
+            'CREATE INDEX portfolio_project_search_idx ON portfolio_project USING GIN (search_vector)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} "
+            f"USING fts5(title, technologies, category, description, tokenize='porter unicode61')"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS portfolio_project_search_idx')
+        schema_editor.execute('ALTER TABLE portfolio_project DROP COLUMN IF EXISTS search_vector')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0005_add_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-17 12:30
+
+# Schema only: fill the index with `python manage.py rebuild_search_index`
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0006_project_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleSearchDocument',
+            fields=[
+                ('article', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='portfolio.article')),
+                ('length', models.FloatField(help_text='Field-weighted token count, used for BM25 length normalization')),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArticleSearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(db_index=True, max_length=64)),
+                ('frequency', models.FloatField(help_text='Field-weighted term frequency')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_postings', to='portfolio.article')),
+            ],
+            options={
+                'unique_together': {('term', 'article')},
+            },
+        ),
+    ]
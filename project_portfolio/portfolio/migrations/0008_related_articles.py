@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-17 13:10
+
+# Schema only: fill the table with `python manage.py rebuild_related_articles`
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0007_blog_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedArticle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='portfolio.article')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='portfolio.article')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['article', '-score'], name='portfolio_related_top_idx')],
+                'unique_together': {('article', 'related')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-17 13:45
+
+# Schema only: render existing articles with `python manage.py rerender_articles`;
+# their empty content_hash never matches, so each one is rendered
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0008_related_articles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='auto_excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
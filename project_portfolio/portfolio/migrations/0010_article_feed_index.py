@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-17 14:20
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_published_at(apps, schema_editor):
+    # Keyset pagination needs a published_at on every published article
+    Article = apps.get_model('portfolio', 'Article')
+    Article.objects.filter(status='published', published_at__isnull=True).update(published_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0009_article_rendering'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_published_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['status', '-published_at', '-id'], name='portfolio_article_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-17 15:05
+
+from django.db import migrations, models
+
+
+def fill_technology_buckets(apps, schema_editor):
+    Project = apps.get_model('portfolio', 'Project')
+    for project in Project.objects.prefetch_related('technologies'):
+        buckets = {}
+        for technology in project.technologies.all():
+            buckets.setdefault(technology.category, []).append({'name': technology.name, 'slug': technology.slug})
+        Project.objects.filter(pk=project.pk).update(technology_buckets=buckets)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0010_article_feed_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='technology_buckets',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(fill_technology_buckets, migrations.RunPython.noop),
+    ]
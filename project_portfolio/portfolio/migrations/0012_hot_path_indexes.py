@@ -0,0 +1,53 @@
+# Generated by Django 4.2 on 2026-10-17 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0011_project_technology_buckets'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('is_featured', True), ('status', 'published')), fields=['-published_at'], name='portfolio_article_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-updated_at'], name='portfolio_article_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['read', '-created_at'], name='portfolio_contact_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['order', '-created_at'], name='portfolio_project_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('show_on_homepage', True)), fields=['order', '-created_at'], name='portfolio_project_home_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-updated_at'], name='portfolio_project_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('is_featured', True), ('show_on_homepage', True)), fields=['order', '-created_at'], name='portfolio_testimonial_home_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['-updated_at'], name='portfolio_testimonial_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tool',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order', 'name'], name='portfolio_tool_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tool',
+            index=models.Index(fields=['-updated_at'], name='portfolio_tool_upd_idx'),
+        ),
+    ]
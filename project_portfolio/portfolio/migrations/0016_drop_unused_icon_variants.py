@@ -0,0 +1,21 @@
+# Generated by Django 4.2 on 2026-10-17 19:53
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0015_image_variants'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='project',
+            name='icon_variants',
+        ),
+        migrations.RemoveField(
+            model_name='skill',
+            name='icon_variants',
+        ),
+    ]
@@ -2,9 +2,43 @@
 Portfolio models - Database models for the portfolio website
 """
 
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.text import slugify
 
+from . import images, rendering
+from .cache import LocalValue
+
+
+# =============================================================================
+# Singleton Base
+# =============================================================================
+
+class SingletonModel(models.Model):
+    """Abstract base for single-row settings models, held in memory per worker"""
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.pk = 1
+        super().save(*args, **kwargs)
+        local_value = self._local_value()
+        transaction.on_commit(local_value.invalidate)
+
+    @classmethod
+    def _local_value(cls):
+        if '_settings_cache' not in cls.__dict__:
+            cls._settings_cache = LocalValue(
+                f'singleton:{cls._meta.label_lower}',
+                lambda: cls.objects.get_or_create(pk=1)[0],
+            )
+        return cls._settings_cache
+
+    @classmethod
+    def get_settings(cls):
+        return cls._local_value().get()
+
 
 # =============================================================================
 # Project Filtering Models
@@ -60,6 +94,23 @@ class Tag(models.Model):
         return self.name
 
 
+# Everything the listing cards and related-article links render
+ARTICLE_SUMMARY_FIELDS = (
+    'id', 'title', 'slug', 'excerpt', 'auto_excerpt', 'featured_image_url', 'featured_image_file',
+    'featured_image_variants', 'status', 'is_featured', 'reading_time', 'published_at',
+)
+
+
+class ArticleQuerySet(models.QuerySet):
+
+    def summaries(self, *extra_fields):
+        """Load only the columns list pages show, never the article bodies"""
+        return self.only(*ARTICLE_SUMMARY_FIELDS, *extra_fields)
+
+    def published(self):
+        return self.filter(status='published')
+
+
 class Article(models.Model):
     """Model to store blog articles"""
     STATUS_CHOICES = [
@@ -80,6 +131,8 @@ class Article(models.Model):
         null=True,
         help_text="Upload featured image directly (recommended: 1200x630)"
     )
+    # Resized copies of featured_image_file, written by images.sync_variants
+    featured_image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     tags = models.ManyToManyField(Tag, blank=True, related_name='articles')
 
@@ -88,22 +141,58 @@ class Article(models.Model):
     reading_time = models.PositiveIntegerField(default=5,
         help_text="Estimated reading time in minutes")
 
+    # Rendered from content on save (see rendering.py)
+    content_html = models.TextField(blank=True, editable=False)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+    auto_excerpt = models.CharField(max_length=500, blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     published_at = models.DateTimeField(null=True, blank=True)
 
+    objects = ArticleQuerySet.as_manager()
+
     class Meta:
         ordering = ['-published_at', '-created_at']
+        indexes = [
+            # Keyset pagination of the blog listings (see pagination.py)
+            models.Index(fields=['status', '-published_at', '-id'], name='portfolio_article_feed_idx'),
+            models.Index(
+                fields=['-published_at'], name='portfolio_article_featured_idx',
+                condition=models.Q(status='published', is_featured=True),
+            ),
+            # latest_update() validators
+            models.Index(fields=['-updated_at'], name='portfolio_article_upd_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if self.content:
-            word_count = len(self.content.split())
-            self.reading_time = max(1, word_count // 200)
+        if self.status == 'published' and self.published_at is None:
+            self.published_at = timezone.now()
+        self.render_content()
         super().save(*args, **kwargs)
 
+    def render_content(self, force=False):
+        """Refresh the rendered columns if the content or renderer changed"""
+        digest = rendering.content_hash(self.content)
+        if digest == self.content_hash and not force:
+            return False
+
+        rendered = rendering.render_markdown(self.content)
+        self.content_html = rendered.html
+        self.toc = rendered.toc
+        self.auto_excerpt = rendered.excerpt
+        self.reading_time = rendered.reading_time
+        self.content_hash = digest
+        return True
+
+    def get_excerpt(self):
+        """Return the written excerpt, or one taken from the content"""
+        return self.excerpt or self.auto_excerpt
+
     def get_absolute_url(self):
         from django.urls import reverse
         return reverse('article_detail', kwargs={'slug': self.slug})
@@ -114,6 +203,55 @@ class Article(models.Model):
             return self.featured_image_file.url
         return self.featured_image_url or '/static/image/default-article.png'
 
+    def get_featured_image_set(self):
+        """Featured image with srcset and AVIF/WebP sources, for a <picture> element"""
+        return images.responsive_image(self.featured_image_file, self.featured_image_variants, self.get_featured_image())
+
+
+# =============================================================================
+# Blog Search Index
+# =============================================================================
+
+class ArticleSearchDocument(models.Model):
+    """Per-article statistics of the blog search index (see article_search.py)"""
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, primary_key=True,
+        related_name='search_document')
+    length = models.FloatField(help_text="Field-weighted token count, used for BM25 length normalization")
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document for {self.article_id}"
+
+
+class ArticleSearchPosting(models.Model):
+    """One term of one article in the blog search index"""
+    term = models.CharField(max_length=64, db_index=True)
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='search_postings')
+    frequency = models.FloatField(help_text="Field-weighted term frequency")
+
+    class Meta:
+        unique_together = ('term', 'article')
+
+    def __str__(self):
+        return f"{self.term} in {self.article_id}"
+
+
+class RelatedArticle(models.Model):
+    """Precomputed nearest neighbour of a published article (see related_articles.py)"""
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['-score']
+        unique_together = ('article', 'related')
+        indexes = [
+            models.Index(fields=['article', '-score'], name='portfolio_related_top_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} -> {self.related_id} ({self.score:.3f})"
+
 
 # =============================================================================
 # Resume Models
@@ -131,6 +269,7 @@ class WorkExperience(models.Model):
     technologies = models.CharField(max_length=500, blank=True,
         help_text="Comma-separated list of technologies used")
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-is_current', '-start_date', 'order']
@@ -158,6 +297,7 @@ class Education(models.Model):
     description = models.TextField(blank=True)
     gpa = models.CharField(max_length=20, blank=True)
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-is_current', '-start_date', 'order']
@@ -178,6 +318,7 @@ class Certification(models.Model):
     credential_url = models.URLField(blank=True)
     badge_image_url = models.URLField(blank=True)
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-issue_date', 'order']
@@ -189,13 +330,14 @@ class Certification(models.Model):
         return self.badge_image_url or None
 
 
-class ResumeSettings(models.Model):
+class ResumeSettings(SingletonModel):
     """Singleton model for resume-specific settings"""
     headline = models.CharField(max_length=200, default='DevOps & Cloud Engineer')
     summary = models.TextField(blank=True, help_text="Professional summary paragraph")
     resume_pdf_url = models.URLField(blank=True, help_text="URL to downloadable PDF resume")
     show_skills_section = models.BooleanField(default=True)
     last_updated = models.DateField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Resume Settings'
@@ -204,15 +346,6 @@ class ResumeSettings(models.Model):
     def __str__(self):
         return "Resume Settings"
 
-    def save(self, *args, **kwargs):
-        self.pk = 1
-        super().save(*args, **kwargs)
-
-    @classmethod
-    def get_settings(cls):
-        obj, created = cls.objects.get_or_create(pk=1)
-        return obj
-
 
 # =============================================================================
 # Testimonials Model
@@ -232,9 +365,17 @@ class Testimonial(models.Model):
     order = models.IntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order', '-created_at']
+        indexes = [
+            models.Index(
+                fields=['order', '-created_at'], name='portfolio_testimonial_home_idx',
+                condition=models.Q(show_on_homepage=True, is_featured=True),
+            ),
+            models.Index(fields=['-updated_at'], name='portfolio_testimonial_upd_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.company or self.role}"
@@ -271,6 +412,7 @@ class Skill(models.Model):
         ('other', 'Other'),
     ])
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order', 'name']
@@ -327,6 +469,7 @@ class Tool(models.Model):
         null=True,
         help_text="Upload tool icon directly (recommended: 128x128 PNG)"
     )
+    icon_variants = models.JSONField(default=dict, blank=True, editable=False)
     color = models.CharField(
         max_length=7,
         default='#6366f1',
@@ -335,9 +478,14 @@ class Tool(models.Model):
     link = models.URLField(blank=True, help_text="Optional link to tool website")
     is_active = models.BooleanField(default=True)
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['order', 'name'], name='portfolio_tool_active_idx', condition=models.Q(is_active=True)),
+            models.Index(fields=['-updated_at'], name='portfolio_tool_upd_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -348,13 +496,18 @@ class Tool(models.Model):
             return self.icon_file.url
         return self.icon_url
 
+    def get_icon_set(self):
+        """Icon with 1x/2x srcset and AVIF/WebP sources"""
+        return images.responsive_image(self.icon_file, self.icon_variants, self.get_icon_url())
+
     def to_dict(self):
         """Convert to dictionary for JSON serialization"""
         return {
             'name': self.name,
             'category': self.get_category_display(),
             'description': self.description,
-            'icon_url': self.get_icon_url(),
+            # The scene draws icons at most 128px wide, so send the resized variant
+            'icon_url': self.get_icon_set().src,
             'color': self.color,
             'link': self.link,
         }
@@ -386,6 +539,8 @@ class Project(models.Model):
         null=True,
         help_text="Upload project icon (recommended: 64x64 or 128x128)"
     )
+    # Resized copies of the uploads, written by images.sync_variants
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     live_url = models.URLField(blank=True)
     github_url = models.URLField(blank=True)
     technologies = models.ManyToManyField(
@@ -393,6 +548,8 @@ class Project(models.Model):
         blank=True,
         related_name='projects'
     )
+    # {category: [{'name': ..., 'slug': ...}]}, kept in sync by signals.py
+    technology_buckets = models.JSONField(default=dict, blank=True, editable=False)
     is_featured = models.BooleanField(default=False)
     show_on_homepage = models.BooleanField(default=False, help_text="Display this project on the homepage")
     order = models.IntegerField(default=0)
@@ -401,6 +558,14 @@ class Project(models.Model):
 
     class Meta:
         ordering = ['order', '-created_at']
+        indexes = [
+            models.Index(fields=['order', '-created_at'], name='portfolio_project_order_idx'),
+            models.Index(
+                fields=['order', '-created_at'], name='portfolio_project_home_idx',
+                condition=models.Q(show_on_homepage=True),
+            ),
+            models.Index(fields=['-updated_at'], name='portfolio_project_upd_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -410,6 +575,34 @@ class Project(models.Model):
             self.slug = slugify(self.title)
         super().save(*args, **kwargs)
 
+    def refresh_technology_buckets(self):
+        """Rebuild the denormalized technology buckets from the m2m rows"""
+        buckets = {}
+        for name, slug, category in self.technologies.values_list('name', 'slug', 'category'):
+            buckets.setdefault(category, []).append({'name': name, 'slug': slug})
+        self.technology_buckets = buckets
+        # update() rather than save(): nothing else about the project changed
+        Project.objects.filter(pk=self.pk).update(technology_buckets=buckets)
+
+    def _technology_names(self, category):
+        return [technology['name'] for technology in self.technology_buckets.get(category, [])]
+
+    @property
+    def technology_slugs(self):
+        return [technology['slug'] for bucket in self.technology_buckets.values() for technology in bucket]
+
+    @property
+    def frontend_skills(self):
+        return self._technology_names('frontend')
+
+    @property
+    def backend_skills(self):
+        return self._technology_names('backend')
+
+    @property
+    def devops_skills(self):
+        return self._technology_names('devops')
+
     def get_category_display_name(self):
         """Return category name from FK or text field"""
         if self.project_category:
@@ -422,6 +615,10 @@ class Project(models.Model):
             return self.image_file.url
         return self.image or '/static/image/default-project.png'
 
+    def get_image_set(self):
+        """Project image with srcset and AVIF/WebP sources, for a <picture> element"""
+        return images.responsive_image(self.image_file, self.image_variants, self.get_image_url())
+
     def get_icon_url(self):
         """Return icon URL if available"""
         if self.icon_file:
@@ -439,12 +636,55 @@ class ContactMessage(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Admin inbox filtered by read state, newest first
+            models.Index(fields=['read', '-created_at'], name='portfolio_contact_inbox_idx'),
+        ]
 
     def __str__(self):
         return f"Message from {self.full_name} - {self.created_at.strftime('%Y-%m-%d')}"
 
 
-class SiteSettings(models.Model):
+class OutboxEmail(models.Model):
+    """An email waiting to be sent by the send_outbox worker (see outbox.py)"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead letter'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+    contact_message = models.ForeignKey(
+        ContactMessage, on_delete=models.SET_NULL, null=True, blank=True, related_name='outbox_emails',
+    )
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Also pushed forward while a worker holds the row, so a crashed worker's batch is retried
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # The worker's "due pending rows" scan
+            models.Index(
+                fields=['next_attempt_at'], name='portfolio_outbox_due_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+class SiteSettings(SingletonModel):
     """Singleton model for site-wide settings"""
     author_name = models.CharField(max_length=100, default='Joni K')
     author_email = models.EmailField(default='johngezae@yahoo.com')
@@ -453,6 +693,7 @@ class SiteSettings(models.Model):
     linkedin_url = models.URLField(default='https://www.linkedin.com/in/joni-kalayu/')
     github_url = models.URLField(default='https://github.com/Johnkalayu')
     resume_url = models.URLField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = 'Site Settings'
@@ -461,12 +702,32 @@ class SiteSettings(models.Model):
     def __str__(self):
         return "Site Settings"
 
-    def save(self, *args, **kwargs):
-        # Ensure only one instance exists
-        self.pk = 1
-        super().save(*args, **kwargs)
 
-    @classmethod
-    def get_settings(cls):
-        obj, created = cls.objects.get_or_create(pk=1)
-        return obj
+# =============================================================================
+# Profiling
+# =============================================================================
+
+class RequestProfile(models.Model):
+    """A profiled request captured by ProfilingMiddleware (see profiling.py)"""
+    TRIGGER_CHOICES = [
+        ('sample', 'Random sample'),
+        ('header', 'Signed header'),
+    ]
+
+    url_name = models.CharField(max_length=100, db_index=True)
+    path = models.CharField(max_length=500)
+    method = models.CharField(max_length=10)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    # zlib-compressed pstats table in cProfile's .prof format (see profiling.prof_file)
+    stats = models.BinaryField()
+    # "frame;frame;frame count" lines from the stack sampler, for flamegraph.pl/speedscope
+    collapsed_stacks = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,165 @@
+"""
+Email outbox - Mail is queued in the database and sent by a background worker
+
+Views call ``enqueue()`` inside the transaction that saves whatever the email
+is about, so the row and the email commit (or roll back) together and the
+request never waits on SMTP. ``python manage.py send_outbox`` drains due rows
+in batches over one reused SMTP connection. A failed send is retried with
+exponential backoff and becomes a dead letter after ``OUTBOX_MAX_ATTEMPTS``,
+or at once when the error is permanent (a malformed message, a 5xx reply).
+
+Rows are claimed by pushing ``next_attempt_at`` forward by
+``OUTBOX_LEASE_SECONDS`` before sending, so several workers can run at once
+and the batch of a worker that dies mid-send is picked up again once the
+lease runs out. Delivery is therefore at least once.
+"""
+
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+logger = logging.getLogger('portfolio.outbox')
+
+PENDING = 'pending'
+SENT = 'sent'
+DEAD = 'dead'
+
+
+def enqueue(subject, body, recipients, from_email=None, reply_to=(), contact_message=None):
+    """Queue an email; call inside the transaction that creates its subject matter"""
+    return OutboxEmail.objects.create(
+        # Header values must be a single line
+        subject=' '.join(subject.split()),
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+        reply_to=list(reply_to),
+        contact_message=contact_message,
+    )
+
+
+def enqueue_contact_notification(contact):
+    """Queue the site owner's notification for a new ``ContactMessage``"""
+    return enqueue(
+        subject=f"Portfolio Contact: {' '.join(contact.full_name.split())}",
+        body=f"From: {contact.full_name}\n"
+             f"Email: {contact.email}\n\n"
+             f"Message:\n{contact.message}",
+        recipients=[settings.SITE_CONFIG.get('email', 'johngezae@yahoo.com')],
+        reply_to=[contact.email],
+        contact_message=contact,
+    )
+
+
+def backoff(attempts):
+    """Delay before retry number ``attempts`` (1-based): base * 2^(n-1), capped"""
+    delay = settings.OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.OUTBOX_MAX_BACKOFF_SECONDS))
+
+
+def claim_batch(batch_size):
+    """Lease up to ``batch_size`` due emails to this worker"""
+    now = timezone.now()
+    with transaction.atomic():
+        due = (
+            OutboxEmail.objects
+            .filter(status=PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'pk')
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        emails = list(due)
+        OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS),
+        )
+    return emails
+
+
+def is_permanent(error):
+    """Errors that retrying the same message cannot fix"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        # 5xx replies are permanent, 4xx are worth retrying
+        return error.smtp_code >= 500
+    # Malformed messages (e.g. BadHeaderError, a ValueError) fail the same way every time
+    return not isinstance(error, (smtplib.SMTPException, OSError))
+
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'[:2000]
+    if is_permanent(error) or email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        email.status = DEAD
+        logger.error('Outbox email %s dead-lettered after %d attempts: %s', email.pk, email.attempts, email.last_error)
+    else:
+        email.next_attempt_at = timezone.now() + backoff(email.attempts)
+        logger.warning('Outbox email %s failed (attempt %d): %s', email.pk, email.attempts, email.last_error)
+    email.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def send_batch(emails, connection):
+    """Send ``emails`` over ``connection``; return ``(sent, failed)``"""
+    sent = failed = 0
+    for email in emails:
+        message = EmailMessage(
+            subject=email.subject,
+            body=email.body,
+            from_email=email.from_email or None,
+            to=email.recipients,
+            reply_to=email.reply_to,
+            connection=connection,
+        )
+        try:
+            message.send(fail_silently=False)
+        except Exception as error:
+            # One bad message must not stop delivery of the rest of the outbox
+            _record_failure(email, error)
+            failed += 1
+            if isinstance(error, (smtplib.SMTPServerDisconnected, OSError)):
+                # The connection is gone; reopen it for the rest of the batch
+                connection.close()
+            continue
+
+        email.status = SENT
+        email.attempts += 1
+        email.sent_at = timezone.now()
+        email.last_error = ''
+        email.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+        sent += 1
+    return sent, failed
+
+
+def drain(batch_size=None, max_batches=None):
+    """
+    Send due emails batch by batch until none are left; return ``(sent, failed)``.
+
+    One SMTP connection is opened for the whole drain and reused by every batch.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    total_sent = total_failed = batches = 0
+
+    connection = None
+    try:
+        while max_batches is None or batches < max_batches:
+            emails = claim_batch(batch_size)
+            if not emails:
+                break
+            if connection is None:
+                connection = get_connection(fail_silently=False)
+            sent, failed = send_batch(emails, connection)
+            total_sent += sent
+            total_failed += failed
+            batches += 1
+    finally:
+        if connection is not None:
+            connection.close()
+
+    return total_sent, total_failed
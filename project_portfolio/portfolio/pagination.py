@@ -0,0 +1,149 @@
+"""
+Keyset pagination - Constant-cost paging over (published_at, id)
+
+Each page is fetched with ``WHERE (published_at, id) < cursor ORDER BY
+published_at DESC, id DESC LIMIT n + 1`` instead of ``OFFSET``, so deep pages
+cost the same as the first one and no ``COUNT(*)`` runs per request. Cursors
+are opaque URL-safe tokens; the "page X of Y" total is an approximation
+cached until the content group changes.
+"""
+
+import base64
+import binascii
+import hashlib
+import math
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from . import metrics
+from .cache import get_group_versions
+
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(number, direction, value, pk):
+    raw = f'{number}|{direction}|{value.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(token):
+    """Return ``(number, direction, value, pk)``, or None for a malformed token"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        number, direction, value, pk = raw.split('|')
+        number, pk, value = int(number), int(pk), parse_datetime(value)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or value is None or number < 1:
+        return None
+    return number, direction, value, pk
+
+
+class CursorPage:
+    """One page of a ``KeysetPaginator``, shaped like Django's ``Page``"""
+
+    def __init__(self, paginator, object_list, number, next_cursor, previous_cursor):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.number = number
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` newest first on ``(key_field, pk)``.
+
+    ``key_field`` must be non-null for every row. The approximate total used
+    by ``num_pages`` is cached per ``group`` version.
+    """
+
+    def __init__(self, queryset, per_page, key_field='published_at', group=None):
+        self.queryset = queryset.order_by(f'-{key_field}', '-pk')
+        self.per_page = per_page
+        self.key_field = key_field
+        self.group = group
+
+    def get_page(self, token=None):
+        cursor = decode_cursor(token) if token else None
+        if cursor is None:
+            return self._page(self.queryset, 1, has_previous=False)
+
+        number, direction, value, pk = cursor
+        before = Q(**{f'{self.key_field}__lt': value}) | Q(**{self.key_field: value, 'pk__lt': pk})
+        after = Q(**{f'{self.key_field}__gt': value}) | Q(**{self.key_field: value, 'pk__gt': pk})
+
+        if direction == NEXT:
+            return self._page(self.queryset.filter(before), number, has_previous=True)
+
+        # Walk backwards in ascending order, then flip the rows back
+        rows = list(self.queryset.filter(after).reverse()[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return self._build(rows, number, has_next=True, has_previous=has_previous and number > 1)
+
+    def cursor_for_page(self, number):
+        """
+        Cursor of page ``number`` (2 or more) counted from the newest row, or
+        None past the last page. Costs one ``OFFSET`` query, so it is meant for
+        translating old ``?page=N`` links, not for paging.
+        """
+        offset = (number - 1) * self.per_page - 1
+        # The last row of the previous page and the first row of this one
+        rows = list(self.queryset.values_list(self.key_field, 'pk')[offset:offset + 2])
+        if len(rows) < 2:
+            return None
+        value, pk = rows[0]
+        return encode_cursor(number, NEXT, value, pk)
+
+    def _page(self, queryset, number, has_previous):
+        rows = list(queryset[:self.per_page + 1])
+        return self._build(rows[:self.per_page], number, len(rows) > self.per_page, has_previous)
+
+    def _build(self, rows, number, has_next, has_previous):
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            last = rows[-1]
+            next_cursor = encode_cursor(number + 1, NEXT, getattr(last, self.key_field), last.pk)
+        if rows and has_previous:
+            first = rows[0]
+            previous_cursor = encode_cursor(number - 1, PREVIOUS, getattr(first, self.key_field), first.pk)
+        return CursorPage(self, rows, number, next_cursor, previous_cursor)
+
+    @cached_property
+    def count(self):
+        """Approximate total, recounted only when ``group`` is bumped"""
+        versions = get_group_versions((self.group,)) if self.group else ()
+        digest = hashlib.md5(f'{self.queryset.query}|{"|".join(versions)}'.encode()).hexdigest()
+        key = f'keyset-count:{digest}'
+
+        count = cache.get(key)
+        metrics.count_cache('keyset_count', count is not None)
+        if count is None:
+            count = self.queryset.count()
+            cache.set(key, count, None if self.group else 300)
+        return count
+
+    @property
+    def num_pages(self):
+        return max(1, math.ceil(self.count / self.per_page))
@@ -0,0 +1,200 @@
+"""
+Profiling - cProfile and a stack sampler for individual production requests
+
+A request is profiled when it carries a valid signed ``X-Profile`` header
+(issued to staff from the admin, see ``RequestProfileAdmin``) or when it is
+picked by ``PROFILING_SAMPLE_RATE``. Unsampled requests cost one header
+lookup and, with a non-zero rate, one ``random()`` call.
+
+A profiled request runs under ``cProfile``, which gives exact call counts
+and times for the top-N table and the downloadable ``.prof`` file, while a
+background thread samples the request thread's stack every
+``PROFILING_SAMPLE_INTERVAL`` seconds for flamegraph input. The sampler can
+only run when the request thread releases the GIL, so pure-Python stretches
+are sampled at ``sys.getswitchinterval()`` (5 ms by default) at best.
+"""
+
+import cProfile
+import marshal
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import signing
+
+from .models import RequestProfile
+
+
+HEADER = 'X-Profile'
+SIGNING_SALT = 'portfolio.profiling'
+
+SAMPLE = 'sample'
+SIGNED_HEADER = 'header'
+
+# The sampler thread's own frames are not part of the request
+_SAMPLER_FILES = (os.path.abspath(__file__), os.path.abspath(threading.__file__))
+
+# cProfile hooks are process-wide on Python 3.12+ (sys.monitoring), so a second
+# profiler in another thread fails to start; one request is profiled at a time
+_profiling_lock = threading.Lock()
+
+
+# =============================================================================
+# Triggers
+# =============================================================================
+
+def issue_token(user):
+    """Signed ``X-Profile`` header value, valid for ``PROFILING_TOKEN_MAX_AGE``"""
+    return signing.dumps({'user': user.pk}, salt=SIGNING_SALT)
+
+
+def verify_token(token):
+    try:
+        return signing.loads(token, salt=SIGNING_SALT, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+
+def profile_trigger(request):
+    """Why ``request`` should be profiled, or None"""
+    token = request.headers.get(HEADER)
+    if token and verify_token(token) is not None:
+        return SIGNED_HEADER
+    rate = settings.PROFILING_SAMPLE_RATE
+    if rate and random.random() < rate:
+        return SAMPLE
+    return None
+
+
+# =============================================================================
+# Capture
+# =============================================================================
+
+@contextmanager
+def exclusive():
+    """True while this thread holds the worker's one profiling slot, False if another thread does"""
+    acquired = _profiling_lock.acquire(blocking=False)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            _profiling_lock.release()
+
+
+def _frame_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class StackSampler(threading.Thread):
+    """Counts the collapsed stacks of one thread until stopped"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if labels:
+                self.stacks[';'.join(reversed(labels))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class RequestProfiler:
+    """Run cProfile and the stack sampler around a block of code on this thread"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL)
+        self.duration = None
+
+    def __enter__(self):
+        self.sampler.start()
+        self._start = time.perf_counter()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        self.duration = time.perf_counter() - self._start
+        self.sampler.stop()
+        return False
+
+    def stats(self):
+        """The pstats table without the sampler's own functions, as a compressed .prof file"""
+        self.profile.create_stats()
+        stats = {
+            key: value for key, value in self.profile.stats.items()
+            if os.path.abspath(key[0]) not in _SAMPLER_FILES
+        }
+        return zlib.compress(marshal.dumps(stats))
+
+    def collapsed_stacks(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.sampler.stacks.most_common())
+
+
+def save_profile(request, response, trigger, profiler):
+    match = request.resolver_match
+    profile = RequestProfile.objects.create(
+        url_name=match.url_name if match and match.url_name else 'unmatched',
+        path=request.get_full_path()[:500],
+        method=request.method,
+        status_code=response.status_code,
+        duration_ms=profiler.duration * 1000,
+        trigger=trigger,
+        stats=profiler.stats(),
+        collapsed_stacks=profiler.collapsed_stacks(),
+    )
+
+    # Keep only the newest PROFILING_KEEP profiles
+    stale = RequestProfile.objects.values_list('pk', flat=True)[settings.PROFILING_KEEP:]
+    RequestProfile.objects.filter(pk__in=list(stale)).delete()
+    return profile
+
+
+# =============================================================================
+# Reports
+# =============================================================================
+
+SORT_KEYS = {
+    'cumulative': lambda row: row['cumtime'],
+    'tottime': lambda row: row['tottime'],
+    'calls': lambda row: row['calls'],
+}
+
+
+def prof_file(stats):
+    """A stored ``RequestProfile.stats`` value as the contents of a .prof file"""
+    return zlib.decompress(bytes(stats))
+
+
+def top_functions(stats, sort='cumulative', limit=30):
+    """The ``limit`` most expensive functions of a stored ``RequestProfile.stats`` value"""
+    rows = []
+    for (filename, line, name), (primitive, calls, tottime, cumtime, callers) in marshal.loads(prof_file(stats)).items():
+        rows.append({
+            'function': name,
+            'location': f'{filename}:{line}' if line else filename,
+            'calls': calls,
+            'primitive_calls': primitive,
+            'tottime': tottime,
+            'cumtime': cumtime,
+        })
+    rows.sort(key=SORT_KEYS.get(sort, SORT_KEYS['cumulative']), reverse=True)
+    return rows[:limit]
@@ -0,0 +1,135 @@
+"""
+Project search - Ranked full-text search over projects
+
+PostgreSQL keeps a weighted ``tsvector`` column on the project table behind a
+GIN index and ranks with ``ts_rank``. SQLite keeps an FTS5 shadow table keyed
+by project id and ranks with ``bm25``. Both index the title, description,
+technology names and category names, and are kept in sync by signals.py.
+Other databases fall back to ``icontains`` filtering in the view.
+"""
+
+import re
+
+from django.db import connection
+
+from .models import Project
+
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'portfolio_project_fts'
+
+# Column weights: title, technologies, category, description
+PG_WEIGHTS = ('A', 'B', 'B', 'C')
+FTS_BM25_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_supported():
+    return connection.vendor in ('postgresql', 'sqlite')
+
+
+def _document(project):
+    """Return the indexed text columns of a project"""
+    technologies = ' '.join(technology.name for technology in project.technologies.all())
+    category = project.project_category.name if project.project_category_id else ''
+    return (
+        project.title,
+        technologies,
+        f'{category} {project.category}'.strip(),
+        project.description,
+    )
+
+
+def _project_table(project_model):
+    return connection.ops.quote_name(project_model._meta.db_table)
+
+
+# =============================================================================
+# Indexing
+# =============================================================================
+
+def index_project(project):
+    """Write or refresh the search entry of a single project"""
+    if not is_supported():
+        return
+
+    columns = _document(project)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            vector = ' || '.join(
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', %s), '{weight}')" for weight in PG_WEIGHTS
+            )
+            cursor.execute(
+                f'UPDATE {_project_table(type(project))} SET search_vector = {vector} WHERE id = %s',
+                [*columns, project.pk],
+            )
+        else:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [project.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, technologies, category, description) '
+                f'VALUES (%s, %s, %s, %s, %s)',
+                [project.pk, *columns],
+            )
+
+
+def remove_project(project_id):
+    """Drop a deleted project from the SQLite shadow table"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [project_id])
+
+
+def rebuild_index():
+    """Re-index every project"""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    projects = Project.objects.select_related('project_category').prefetch_related('technologies')
+    for project in projects:
+        index_project(project)
+
+
+# =============================================================================
+# Querying
+# =============================================================================
+
+def _terms(query):
+    return [token.lower() for token in _TOKEN_RE.findall(query)]
+
+
+def search(query):
+    """
+    Return matching project ids, most relevant first.
+
+    Every word must match, and the last word also matches as a prefix so
+    partial input still finds results. Returns None when the database has no
+    search backend.
+    """
+    if not is_supported():
+        return None
+
+    terms = _terms(query)
+    if not terms:
+        return []
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            tsquery = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+            cursor.execute(
+                f"SELECT id FROM {_project_table(Project)}, "
+                f"to_tsquery('{SEARCH_CONFIG}', %s) query "
+                f"WHERE search_vector @@ query "
+                f"ORDER BY ts_rank(search_vector, query) DESC, id",
+                [tsquery],
+            )
+        else:
+            match = ' '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+            weights = ', '.join(str(weight) for weight in FTS_BM25_WEIGHTS)
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, {weights}), rowid',
+                [match],
+            )
+        return [row[0] for row in cursor.fetchall()]
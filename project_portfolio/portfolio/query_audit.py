@@ -0,0 +1,160 @@
+"""
+Query audit - SQL fingerprints, N+1 detection and per-view query budgets
+
+Every statement a request runs is reduced to a fingerprint: the SQL with its
+literals, placeholders and ``IN (...)`` lists collapsed, so the same query
+for different rows maps to the same string. A fingerprint seen more than
+once per request is almost always a query inside a loop (an N+1) and is
+reported with the template line or Python line that issued it.
+
+Budgets are declared per URL name in ``settings.QUERY_BUDGETS``; see
+``QueryAuditMiddleware`` for how they are enforced.
+"""
+
+import logging
+import os
+import re
+import sys
+import sysconfig
+from collections import Counter
+
+from django.conf import settings
+
+
+logger = logging.getLogger('portfolio.queries')
+
+
+class QueryBudgetExceeded(Exception):
+    """A view ran more queries than its budget allows"""
+
+
+# =============================================================================
+# Fingerprints
+# =============================================================================
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_RE = re.compile(r'%s|\?')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """``sql`` with every literal replaced by ``?`` and value lists collapsed"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _PLACEHOLDER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('(...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+# =============================================================================
+# Call Sites
+# =============================================================================
+
+# Django, the standard library and installed packages are never the culprit
+_IGNORED_PATHS = (
+    os.path.dirname(sys.modules['django'].__file__) + os.sep,
+    sysconfig.get_paths()['stdlib'] + os.sep,
+    sysconfig.get_paths()['purelib'] + os.sep,
+    os.path.abspath(__file__),
+)
+
+
+def call_site():
+    """
+    Where the current query comes from: the innermost template line being
+    rendered, and the innermost Python line outside Django.
+    """
+    template = source = None
+    frame = sys._getframe(1)
+    while frame is not None and (template is None or source is None):
+        code = frame.f_code
+        if template is None and code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                template = f'{origin.template_name}:{token.lineno} ({token.contents})'
+        if source is None and not code.co_filename.startswith(_IGNORED_PATHS):
+            source = f'{os.path.relpath(code.co_filename, settings.BASE_DIR)}:{frame.f_lineno} in {code.co_name}'
+        frame = frame.f_back
+    return ' via '.join(site for site in (template, source) if site) or 'unknown'
+
+
+# =============================================================================
+# Recorder
+# =============================================================================
+
+class QueryAudit:
+    """
+    ``connection.execute_wrapper`` that records every statement.
+
+    Install with ``with connection.execute_wrapper(audit):``; read the result
+    from ``count``, ``queries`` and ``repeated()``.
+    """
+
+    def __init__(self, locate=True):
+        self.locate = locate
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, params, call_site() if self.locate else None))
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def selects(self):
+        return [(sql, params) for sql, params, site in self.queries if sql.lstrip().upper().startswith('SELECT')]
+
+    def repeated(self, threshold=2):
+        """``[(fingerprint, count, call sites)]`` for fingerprints run at least ``threshold`` times"""
+        counts = Counter()
+        sites = {}
+        for sql, params, site in self.queries:
+            key = fingerprint(sql)
+            counts[key] += 1
+            sites.setdefault(key, Counter())[site] += 1
+        return [
+            (key, count, sites[key].most_common())
+            for key, count in counts.most_common() if count >= threshold
+        ]
+
+
+def query_budget(url_name):
+    """The declared budget for ``url_name``, or None"""
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(url_name)
+
+
+def public_urls():
+    """Paths covering every public view, built from the current database"""
+    from .models import Article, Tag, Technology
+    from .pagination import KeysetPaginator
+    from .views import ARTICLES_PER_PAGE
+
+    urls = ['/', '/projects/', '/projects/?q=django', '/api/projects/facets/', '/api/tools/', '/resume/']
+
+    technology = Technology.objects.first()
+    if technology:
+        urls.append(f'/projects/?tech={technology.slug}')
+        urls.append(f'/api/projects/facets/?tech={technology.slug}')
+
+    urls.append('/blog/')
+    first_page = KeysetPaginator(Article.objects.published().only('pk', 'published_at'), ARTICLES_PER_PAGE).get_page()
+    if first_page.has_next():
+        urls.append(f'/blog/?cursor={first_page.next_cursor}')
+
+    tag = Tag.objects.first()
+    if tag:
+        urls.append(f'/blog/tag/{tag.slug}/')
+
+    article = Article.objects.published().only('slug', 'title').first()
+    if article:
+        urls.append(article.get_absolute_url())
+        word = article.title.split()[0] if article.title.split() else 'blog'
+        urls.append(f'/search/blog/?q={word}')
+        urls.append(f'/api/blog/search/?q={word}')
+
+    return urls
@@ -0,0 +1,176 @@
+"""
+Rate limiting - Sliding-window limits and duplicate collapsing for form posts
+
+Each limit counts hits per identifier (client IP, email address, ...) in the
+shared Django cache, so every worker sees the same totals. Counts live in
+fixed windows and the previous window is weighted by how much of it still
+overlaps the sliding window, which costs three cache calls per hit and needs
+no per-hit timestamps.
+
+Once an identifier is over its limit, the worker also remembers it in an
+in-process table until the limit resets, so a flood from one client is
+rejected without touching the cache, the database or SMTP.
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+
+# Local blocks kept before expired ones are pruned
+MAX_LOCAL_BLOCKS = 10000
+
+# (scope, identifier hash) -> time.time() the block ends
+_blocked = {}
+_blocked_lock = threading.Lock()
+
+
+def _digest(value):
+    # Keeps keys short and cache-safe, and keeps addresses out of the cache
+    return hashlib.sha256(value.encode()).hexdigest()[:32]
+
+
+def client_ip(request):
+    """
+    The client's address, taking ``RATELIMIT_PROXY_COUNT`` trusted proxies into account.
+
+    Each proxy appends the address it received the request from to
+    X-Forwarded-For, so the client is the Nth entry from the right; entries
+    further left are supplied by the client and cannot be trusted.
+    """
+    proxies = settings.RATELIMIT_PROXY_COUNT
+    if proxies:
+        forwarded = [part.strip() for part in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if part.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+# =============================================================================
+# Sliding Window
+# =============================================================================
+
+def _locally_blocked(key, now):
+    until = _blocked.get(key)
+    if until is None:
+        return 0
+    if until <= now:
+        _blocked.pop(key, None)
+        return 0
+    return until - now
+
+
+def _block_locally(key, until):
+    with _blocked_lock:
+        if len(_blocked) >= MAX_LOCAL_BLOCKS:
+            now = time.time()
+            for stale in [k for k, end in _blocked.items() if end <= now]:
+                del _blocked[stale]
+            if len(_blocked) >= MAX_LOCAL_BLOCKS:
+                _blocked.clear()
+        _blocked[key] = until
+
+
+def hit(scope, identifier, limit, window):
+    """
+    Count one hit for ``identifier``; return 0 if allowed, else seconds until retry.
+
+    At most ``limit`` hits are allowed in any ``window`` seconds (approximately:
+    hits in the previous fixed window are assumed to be spread evenly).
+    """
+    now = time.time()
+    key = (scope, _digest(identifier))
+    retry_after = _locally_blocked(key, now)
+    if retry_after:
+        return retry_after
+
+    bucket = int(now // window)
+    prefix = f'ratelimit:{scope}:{key[1]}'
+    current_key = f'{prefix}:{bucket}'
+    # Two windows, so the count is still there while it is the previous window
+    cache.add(current_key, 0, window * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(current_key, 1, window * 2)
+        current = 1
+    previous = cache.get(f'{prefix}:{bucket - 1}', 0)
+
+    elapsed = now - bucket * window
+    overlap = 1 - elapsed / window
+    if previous * overlap + current <= limit:
+        return 0
+
+    if current > limit:
+        # Over on this window's hits alone: blocked until the next window starts and
+        # until enough of this one has slid out that the weighted count fits again
+        retry_after = window - elapsed + window * (1 - limit / current)
+    else:
+        # The previous window's share has to decay until the estimate fits
+        retry_after = window * (1 - (limit - current) / previous) - elapsed
+    retry_after = max(retry_after, 1)
+    _block_locally(key, now + retry_after)
+    return retry_after
+
+
+def is_duplicate(scope, parts, window):
+    """
+    True if the same ``parts`` were already submitted within ``window`` seconds.
+
+    The first submission claims the fingerprint; call ``forget_submission`` if
+    it then fails, so a retry is not mistaken for a duplicate.
+    """
+    key = f'ratelimit:{scope}:dup:{_digest(chr(31).join(parts))}'
+    return not cache.add(key, 1, window)
+
+
+def forget_submission(scope, parts):
+    cache.delete(f'ratelimit:{scope}:dup:{_digest(chr(31).join(parts))}')
+
+
+# =============================================================================
+# Contact Form
+# =============================================================================
+
+CONTACT = 'contact'
+
+
+def contact_retry_after(request, email=None):
+    """
+    Apply ``CONTACT_RATE_LIMITS`` to a contact form post; 0 or seconds until retry.
+
+    Called without ``email`` before the form is validated, which applies the
+    per-IP limit, and with the validated address afterwards, which applies the
+    per-address limit. Only valid posts count against an address, so junk
+    posts naming someone else's address cannot lock them out.
+    """
+    limits = settings.CONTACT_RATE_LIMITS
+    if email is None:
+        identifiers = {'ip': client_ip(request)}
+    else:
+        identifiers = {'email': email.strip().lower()}
+    for name, (limit, window) in limits.items():
+        identifier = identifiers.get(name)
+        if not identifier:
+            continue
+        retry_after = hit(f'{CONTACT}:{name}', identifier, limit, window)
+        if retry_after:
+            metrics.count_rate_limited(f'{CONTACT}:{name}')
+            return math.ceil(retry_after)
+    return 0
+
+
+def contact_fingerprint(cleaned_data):
+    """What makes two contact form posts the same submission"""
+    return (
+        cleaned_data['email'],
+        ' '.join(cleaned_data['full_name'].split()).lower(),
+        ' '.join(cleaned_data['message'].split()),
+    )
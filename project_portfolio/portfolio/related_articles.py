@@ -0,0 +1,179 @@
+"""
+Related articles - Precomputed nearest neighbours of each published article
+
+Similarity blends the cosine of TF-IDF vectors, built with NumPy from the
+blog search postings, with the Jaccard similarity of tag sets. The top
+``RELATED_LIMIT`` neighbours of every article are stored in ``RelatedArticle``
+so the detail page reads them with one indexed query. Saving an article only
+recomputes its own row and its column (its score against every other
+article); see signals.py. The small IDF drift one edit causes in unrelated
+pairs is picked up by the next ``rebuild_related_articles``.
+"""
+
+import numpy as np
+from django.apps import apps as global_apps
+from django.db import transaction
+
+
+RELATED_LIMIT = 3
+
+TEXT_WEIGHT = 0.7
+TAG_WEIGHT = 0.3
+
+
+class SimilarityModel:
+    """
+    TF-IDF vectors and tag sets of every published article.
+
+    Vectors are held in coordinate form (one entry per search posting), so
+    memory grows with the postings rather than articles x vocabulary.
+    """
+
+    def __init__(self):
+        Article = global_apps.get_model('portfolio', 'Article')
+        ArticleSearchPosting = global_apps.get_model('portfolio', 'ArticleSearchPosting')
+
+        self.article_ids = np.array(
+            Article.objects.filter(status='published').order_by('pk').values_list('pk', flat=True),
+            dtype=np.int64,
+        )
+        self.count = len(self.article_ids)
+
+        postings = list(
+            ArticleSearchPosting.objects.filter(article__status='published')
+            .values_list('article_id', 'term', 'frequency')
+        )
+        terms = [term for article_id, term, frequency in postings]
+        self.terms, term_codes = np.unique(np.array(terms, dtype=object), return_inverse=True)
+        self.term_codes = term_codes.astype(np.int64)
+        self.docs = self._positions([article_id for article_id, term, frequency in postings])
+
+        frequencies = np.array([frequency for article_id, term, frequency in postings], dtype=np.float64)
+        document_frequency = np.bincount(self.term_codes, minlength=len(self.terms))
+        idf = np.log((1 + self.count) / (1 + document_frequency)) + 1
+        self.weights = (1 + np.log(np.maximum(frequencies, 1))) * idf[self.term_codes]
+        self.norms = np.sqrt(np.bincount(self.docs, weights=self.weights ** 2, minlength=self.count))
+
+        tagged = list(
+            Article.tags.through.objects.filter(article__status='published')
+            .values_list('article_id', 'tag_id')
+        )
+        self.tag_docs = self._positions([article_id for article_id, tag_id in tagged])
+        self.tag_ids = np.array([tag_id for article_id, tag_id in tagged], dtype=np.int64)
+        self.tag_counts = np.bincount(self.tag_docs, minlength=self.count)
+
+    def _positions(self, article_ids):
+        return np.searchsorted(self.article_ids, np.array(article_ids, dtype=np.int64))
+
+    def __contains__(self, article_id):
+        position = np.searchsorted(self.article_ids, article_id)
+        return position < self.count and self.article_ids[position] == article_id
+
+    def scores(self, article_id):
+        """Blended similarity of ``article_id`` to every article, aligned with ``article_ids``"""
+        position = np.searchsorted(self.article_ids, article_id)
+
+        # Cosine: dot products only touch postings of terms the article contains
+        own = self.docs == position
+        query = np.zeros(len(self.terms))
+        query[self.term_codes[own]] = self.weights[own]
+        shared = query[self.term_codes] > 0
+        dots = np.bincount(
+            self.docs[shared], weights=self.weights[shared] * query[self.term_codes[shared]], minlength=self.count,
+        )
+        denominators = self.norms * self.norms[position]
+        cosine = np.divide(dots, denominators, out=np.zeros(self.count), where=denominators > 0)
+
+        # Jaccard over tag ids
+        own_tags = self.tag_ids[self.tag_docs == position]
+        common = np.bincount(
+            self.tag_docs[np.isin(self.tag_ids, own_tags)], minlength=self.count,
+        ).astype(np.float64)
+        union = self.tag_counts + len(own_tags) - common
+        jaccard = np.divide(common, union, out=np.zeros(self.count), where=union > 0)
+
+        scores = TEXT_WEIGHT * cosine + TAG_WEIGHT * jaccard
+        scores[position] = 0
+        return scores
+
+    def top(self, article_id, limit=RELATED_LIMIT):
+        """Return ``[(related_id, score)]`` of the closest articles, best first"""
+        scores = self.scores(article_id)
+        best = np.argsort(-scores, kind='stable')[:limit]
+        return [(int(self.article_ids[i]), float(scores[i])) for i in best if scores[i] > 0]
+
+
+# =============================================================================
+# Maintenance
+# =============================================================================
+
+def _write_rows(RelatedArticle, rows):
+    """Replace the stored neighbours of each article in ``rows``"""
+    RelatedArticle.objects.filter(article_id__in=list(rows)).delete()
+    RelatedArticle.objects.bulk_create([
+        RelatedArticle(article_id=article_id, related_id=related_id, score=score)
+        for article_id, neighbours in rows.items()
+        for related_id, score in neighbours
+    ])
+
+
+def rebuild():
+    """Recompute every article's neighbours"""
+    RelatedArticle = global_apps.get_model('portfolio', 'RelatedArticle')
+    model = SimilarityModel()
+
+    with transaction.atomic():
+        RelatedArticle.objects.all().delete()
+        _write_rows(RelatedArticle, {
+            int(article_id): model.top(article_id) for article_id in model.article_ids
+        })
+
+
+def refresh_rows(article_ids):
+    """Recompute the rows of the given articles, e.g. after a neighbour was deleted"""
+    from .models import RelatedArticle
+
+    model = SimilarityModel()
+    with transaction.atomic():
+        _write_rows(RelatedArticle, {
+            article_id: model.top(article_id) for article_id in article_ids if article_id in model
+        })
+
+
+def update_article(article_id):
+    """Recompute the row and column of one article after it changed"""
+    from .models import RelatedArticle
+
+    model = SimilarityModel()
+
+    stored = {}
+    for owner_id, related_id, score in RelatedArticle.objects.values_list('article_id', 'related_id', 'score'):
+        stored.setdefault(owner_id, []).append((related_id, score))
+
+    rows = {}
+    if article_id in model:
+        rows[article_id] = model.top(article_id)
+        column = dict(zip(model.article_ids.tolist(), model.scores(article_id).tolist()))
+    else:
+        # Unpublished or deleted: it only leaves other articles' rows
+        rows[article_id] = []
+        column = {}
+
+    for owner_id in model.article_ids.tolist():
+        if owner_id == article_id:
+            continue
+        neighbours = stored.get(owner_id, [])
+        previous = dict(neighbours).get(article_id)
+        score = column.get(owner_id, 0)
+
+        if previous is not None and score < previous:
+            # Weaker than before: an article below the stored cut may now beat it
+            rows[owner_id] = model.top(owner_id)
+        elif score > 0:
+            others = [(related_id, value) for related_id, value in neighbours if related_id != article_id]
+            updated = sorted(others + [(article_id, score)], key=lambda item: -item[1])[:RELATED_LIMIT]
+            if updated != neighbours:
+                rows[owner_id] = updated
+
+    with transaction.atomic():
+        _write_rows(RelatedArticle, rows)
@@ -0,0 +1,88 @@
+"""
+Article rendering - Markdown to sanitized HTML, once per content change
+
+``Article.save()`` renders the Markdown body into denormalized columns (HTML,
+table of contents, auto excerpt, reading time) keyed by ``content_hash``, so
+requests serve stored HTML. The hash covers ``RENDERER_VERSION``: bump it
+whenever the output of this module changes and run ``rerender_articles``.
+"""
+
+import hashlib
+import re
+from collections import namedtuple
+from html import unescape
+
+import markdown
+import nh3
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+
+RENDERER_VERSION = 1
+
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists', 'nl2br', 'toc']
+MARKDOWN_EXTENSION_CONFIGS = {
+    'toc': {
+        'permalink': '#',
+        'permalink_class': 'heading-anchor',
+        'permalink_title': 'Link to this section',
+        'toc_depth': '2-3',
+    },
+}
+
+ALLOWED_TAGS = nh3.ALLOWED_TAGS | {'tfoot'}
+ALLOWED_ATTRIBUTES = {
+    **{tag: set(attributes) for tag, attributes in nh3.ALLOWED_ATTRIBUTES.items()},
+    'a': {'href', 'hreflang', 'title', 'class'},
+    'code': {'class'},
+    **{f'h{level}': {'id'} for level in range(1, 7)},
+}
+
+WORDS_PER_MINUTE = 200
+EXCERPT_WORDS = 40
+EXCERPT_MAX_LENGTH = 500
+
+_PARAGRAPH_RE = re.compile(r'<p>(.*?)</p>', re.DOTALL)
+
+RenderedContent = namedtuple('RenderedContent', ['html', 'toc', 'excerpt', 'reading_time'])
+
+
+def content_hash(content):
+    return hashlib.sha256(f'{RENDERER_VERSION}\n{content or ""}'.encode()).hexdigest()
+
+
+def _flatten_toc(tokens):
+    """Flatten python-markdown's nested toc tokens into ``[{level, id, title}]``"""
+    entries = []
+    for token in tokens:
+        entries.append({'level': token['level'], 'id': token['id'], 'title': unescape(strip_tags(token['name']))})
+        entries.extend(_flatten_toc(token['children']))
+    return entries
+
+
+def _text(html):
+    return ' '.join(unescape(strip_tags(html)).split())
+
+
+def render_markdown(content):
+    """Render an article body into ``RenderedContent``"""
+    renderer = markdown.Markdown(
+        extensions=MARKDOWN_EXTENSIONS, extension_configs=MARKDOWN_EXTENSION_CONFIGS,
+    )
+    html = nh3.clean(
+        renderer.convert(content or ''),
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+    )
+
+    paragraphs = ' '.join(_text(paragraph) for paragraph in _PARAGRAPH_RE.findall(html))
+    excerpt = Truncator(Truncator(paragraphs).words(EXCERPT_WORDS)).chars(EXCERPT_MAX_LENGTH)
+
+    word_count = len(_text(html).split())
+
+    return RenderedContent(
+        html=html,
+        toc=_flatten_toc(renderer.toc_tokens),
+        excerpt=excerpt,
+        reading_time=max(1, word_count // WORDS_PER_MINUTE),
+    )
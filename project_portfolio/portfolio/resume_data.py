@@ -0,0 +1,47 @@
+"""
+Resume data - Everything the resume body renders, loaded on first use
+
+``resume.html`` keeps its body in a ``{% cache %}`` fragment keyed by the
+RESUME group version, and only reads from ``ResumeData`` inside that
+fragment, so a fragment hit runs no resume queries at all. On a miss each
+model is read with a single query.
+"""
+
+from django.utils.functional import cached_property
+
+from .cache import RESUME, get_group_versions, release_token
+from .models import WorkExperience, Education, Certification, Skill
+
+
+def fragment_version():
+    """Cache key part for the resume body fragment"""
+    return f'{release_token()}:{get_group_versions((RESUME,))[0]}'
+
+
+class ResumeData:
+
+    @cached_property
+    def work_experiences(self):
+        experiences = list(WorkExperience.objects.all())
+        for experience in experiences:
+            experience.description_lines = [
+                line for line in experience.description.splitlines() if line.strip()
+            ]
+            experience.technologies_list = experience.get_technologies_list()
+        return experiences
+
+    @cached_property
+    def education(self):
+        return list(Education.objects.all())
+
+    @cached_property
+    def certifications(self):
+        return list(Certification.objects.all())
+
+    @cached_property
+    def skills_by_category(self):
+        """Skills grouped by category in one pass, in the category choice order"""
+        groups = {category: [] for category, label in Skill._meta.get_field('category').choices}
+        for skill in Skill.objects.all():
+            groups.setdefault(skill.category, []).append(skill)
+        return groups
@@ -0,0 +1,259 @@
+"""
+Portfolio signals - Keep cached pages and search indexes in step with admin edits
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+
+from . import article_search, cache, images, project_search, related_articles
+from .models import (
+    Project, Skill, SiteSettings,
+    ProjectCategory, Technology,
+    Tag, Article,
+    WorkExperience, Education, Certification, ResumeSettings,
+    Testimonial, Tool, RelatedArticle
+)
+
+
+# Page groups affected by a change to each model
+PAGE_GROUPS_BY_MODEL = {
+    Project: (cache.HOME, cache.PROJECTS),
+    ProjectCategory: (cache.HOME, cache.PROJECTS),
+    Technology: (cache.HOME, cache.PROJECTS),
+    Testimonial: (cache.HOME,),
+    Tag: (cache.BLOG,),
+    Article: (cache.BLOG,),
+    WorkExperience: (cache.RESUME,),
+    Education: (cache.RESUME,),
+    Certification: (cache.RESUME,),
+    ResumeSettings: (cache.RESUME,),
+    Skill: (cache.RESUME,),
+    Tool: cache.PAGE_GROUPS + (cache.TOOLS,),
+    SiteSettings: cache.PAGE_GROUPS,
+}
+
+M2M_ACTIONS = ('post_add', 'post_remove', 'post_clear')
+
+
+def _bump_after_commit(groups):
+    # Bumping before commit would let another worker re-cache the old rows
+    # under the new version token.
+    transaction.on_commit(partial(cache.bump_groups, *groups))
+
+
+def invalidate_pages(sender, **kwargs):
+    """Bump the page groups that render rows of ``sender``"""
+    _bump_after_commit(PAGE_GROUPS_BY_MODEL[sender])
+
+
+def invalidate_pages_m2m(sender, instance, action, **kwargs):
+    """Bump page groups when a project's technologies or an article's tags change"""
+    if action in M2M_ACTIONS:
+        _bump_after_commit(PAGE_GROUPS_BY_MODEL[type(instance)])
+
+
+def index_project(sender, instance, **kwargs):
+    project_search.index_project(instance)
+
+
+def _reverse_pk_set(instance, action, pk_set, related_name, attribute):
+    """
+    Ids on the far side of a reverse m2m change, e.g. ``technology.projects.clear()``.
+
+    ``post_clear`` sends no ``pk_set`` and runs once the links are gone, so the
+    ids are read at ``pre_clear`` and kept on the instance under ``attribute``.
+    """
+    if action == 'pre_clear':
+        setattr(instance, attribute, list(getattr(instance, related_name).values_list('pk', flat=True)))
+    elif action == 'post_clear':
+        return getattr(instance, attribute, [])
+    return pk_set
+
+
+def index_project_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # technology.projects.add(...) and friends
+        pk_set = _reverse_pk_set(instance, action, pk_set, 'projects', '_search_cleared_ids')
+    if action not in M2M_ACTIONS:
+        return
+    if not reverse:
+        project_search.index_project(instance)
+    else:
+        for project in Project.objects.filter(pk__in=pk_set):
+            project_search.index_project(project)
+
+
+def unindex_project(sender, instance, **kwargs):
+    project_search.remove_project(instance.pk)
+
+
+def reindex_related_projects(sender, instance, **kwargs):
+    """Technology and category names are part of each project's search document"""
+    for project in instance.projects.all():
+        project_search.index_project(project)
+
+
+def remember_search_projects(sender, instance, **kwargs):
+    # The delete unlinks projects via SET_NULL/m2m row removal, neither of which sends signals
+    instance._search_project_ids = list(instance.projects.values_list('pk', flat=True))
+
+
+def reindex_unlinked_projects(sender, instance, **kwargs):
+    project_ids = getattr(instance, '_search_project_ids', [])
+    projects = Project.objects.filter(pk__in=project_ids).select_related('project_category').prefetch_related('technologies')
+    for project in projects:
+        project_search.index_project(project)
+
+
+class _RelatedUpdates:
+    """Articles whose related rows are recomputed when the current transaction commits"""
+
+    def __init__(self):
+        self.article_ids = set()
+
+    def __call__(self):
+        # The first callback of a commit takes the whole set; later ones find it empty
+        article_ids, self.article_ids = self.article_ids, set()
+        for article_id in sorted(article_ids):
+            related_articles.update_article(article_id)
+        if article_ids:
+            cache.bump_groups(cache.BLOG)
+
+
+def _update_related_after_commit(article_id):
+    # An admin save fires post_save and m2m_changed; recompute once, after
+    # commit, when the article's postings and tags are final. The callback is
+    # registered on every call, because a rollback silently drops earlier
+    # registrations. Ids left over from a rolled-back transaction are
+    # recomputed at the next commit, which is wasted work but harmless.
+    connection = transaction.get_connection()
+    updates = getattr(connection, '_related_updates', None)
+    if updates is None:
+        updates = connection._related_updates = _RelatedUpdates()
+    updates.article_ids.add(article_id)
+    transaction.on_commit(updates)
+
+
+def index_article(sender, instance, **kwargs):
+    article_search.index_article(instance)
+    _update_related_after_commit(instance.pk)
+
+
+def index_article_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        pk_set = _reverse_pk_set(instance, action, pk_set, 'articles', '_search_cleared_ids')
+    if action not in M2M_ACTIONS:
+        return
+    if not reverse:
+        article_search.index_article(instance)
+        _update_related_after_commit(instance.pk)
+    else:
+        for article in Article.objects.filter(pk__in=pk_set).prefetch_related('tags'):
+            article_search.index_article(article)
+            _update_related_after_commit(article.pk)
+
+
+def reindex_tagged_articles(sender, instance, **kwargs):
+    """Tag names are part of each article's search document"""
+    for article in instance.articles.prefetch_related('tags'):
+        article_search.index_article(article)
+
+
+def remember_tagged_articles(sender, instance, **kwargs):
+    # Deleting a tag clears its m2m rows without sending m2m_changed
+    instance._search_article_ids = list(instance.articles.values_list('pk', flat=True))
+
+
+def reindex_untagged_articles(sender, instance, **kwargs):
+    article_ids = getattr(instance, '_search_article_ids', [])
+    for article in Article.objects.filter(pk__in=article_ids).prefetch_related('tags'):
+        article_search.index_article(article)
+        _update_related_after_commit(article.pk)
+
+
+def remember_related_owners(sender, instance, **kwargs):
+    # The cascade removes this article from its neighbours' rows, leaving gaps
+    instance._related_owner_ids = list(
+        RelatedArticle.objects.filter(related=instance).values_list('article_id', flat=True)
+    )
+
+
+def refill_related_rows(sender, instance, **kwargs):
+    owner_ids = getattr(instance, '_related_owner_ids', [])
+    if not owner_ids:
+        return
+
+    def refill():
+        related_articles.refresh_rows(owner_ids)
+        cache.bump_groups(cache.BLOG)
+
+    transaction.on_commit(refill)
+
+
+def refresh_buckets_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        pk_set = _reverse_pk_set(instance, action, pk_set, 'projects', '_bucket_cleared_ids')
+    if action not in M2M_ACTIONS:
+        return
+    if not reverse:
+        instance.refresh_technology_buckets()
+    else:
+        for project in Project.objects.filter(pk__in=pk_set):
+            project.refresh_technology_buckets()
+
+
+def refresh_technology_projects(sender, instance, **kwargs):
+    """Technology names, slugs and categories are copied into each project"""
+    for project in instance.projects.all():
+        project.refresh_technology_buckets()
+
+
+def remember_technology_projects(sender, instance, **kwargs):
+    # Deleting a technology clears its m2m rows without sending m2m_changed
+    instance._bucket_project_ids = list(instance.projects.values_list('pk', flat=True))
+
+
+def refresh_untagged_projects(sender, instance, **kwargs):
+    for project in Project.objects.filter(pk__in=getattr(instance, '_bucket_project_ids', [])):
+        project.refresh_technology_buckets()
+
+
+def refresh_image_variants(sender, instance, raw=False, **kwargs):
+    # Before commit, so the page cache bump that follows sees the new variants
+    if not raw:
+        images.sync_variants(instance)
+
+
+def connect_signals():
+    for model in PAGE_GROUPS_BY_MODEL:
+        post_save.connect(invalidate_pages, sender=model, dispatch_uid=f'page_cache_save_{model.__name__}')
+        post_delete.connect(invalidate_pages, sender=model, dispatch_uid=f'page_cache_delete_{model.__name__}')
+
+    for through in (Project.technologies.through, Article.tags.through):
+        m2m_changed.connect(invalidate_pages_m2m, sender=through, dispatch_uid=f'page_cache_m2m_{through.__name__}')
+
+    post_save.connect(index_project, sender=Project, dispatch_uid='project_search_save')
+    post_delete.connect(unindex_project, sender=Project, dispatch_uid='project_search_delete')
+    m2m_changed.connect(index_project_m2m, sender=Project.technologies.through, dispatch_uid='project_search_m2m')
+    for model in (Technology, ProjectCategory):
+        post_save.connect(reindex_related_projects, sender=model, dispatch_uid=f'project_search_{model.__name__}')
+        pre_delete.connect(remember_search_projects, sender=model, dispatch_uid=f'project_search_pre_delete_{model.__name__}')
+        post_delete.connect(reindex_unlinked_projects, sender=model, dispatch_uid=f'project_search_delete_{model.__name__}')
+
+    m2m_changed.connect(refresh_buckets_m2m, sender=Project.technologies.through, dispatch_uid='technology_buckets_m2m')
+    post_save.connect(refresh_technology_projects, sender=Technology, dispatch_uid='technology_buckets_save')
+    pre_delete.connect(remember_technology_projects, sender=Technology, dispatch_uid='technology_buckets_pre_delete')
+    post_delete.connect(refresh_untagged_projects, sender=Technology, dispatch_uid='technology_buckets_delete')
+
+    post_save.connect(index_article, sender=Article, dispatch_uid='blog_search_save')
+    m2m_changed.connect(index_article_m2m, sender=Article.tags.through, dispatch_uid='blog_search_m2m')
+    post_save.connect(reindex_tagged_articles, sender=Tag, dispatch_uid='blog_search_tag_save')
+    pre_delete.connect(remember_tagged_articles, sender=Tag, dispatch_uid='blog_search_tag_pre_delete')
+    post_delete.connect(reindex_untagged_articles, sender=Tag, dispatch_uid='blog_search_tag_delete')
+    pre_delete.connect(remember_related_owners, sender=Article, dispatch_uid='related_articles_pre_delete')
+    post_delete.connect(refill_related_rows, sender=Article, dispatch_uid='related_articles_delete')
+
+    for model in (Article, Project, Tool):
+        post_save.connect(refresh_image_variants, sender=model, dispatch_uid=f'image_variants_{model.__name__}')
@@ -0,0 +1,109 @@
+"""
+Thumbnails - Small WebP copies of uploads, made on first request and kept on disk
+
+``thumbnail_url()`` signs the upload's storage name and a preset size from
+``THUMBNAIL_SIZES`` into the URL, so the endpoint only ever resizes files and
+sizes the server asked for. The first request decodes the upload, shrinks it
+to fit the preset box (smaller uploads keep their size) and writes the result
+to ``THUMBNAIL_CACHE_DIR`` under a hash of the upload's name, byte size and
+modification time. Every later request is a stat and a file read.
+
+Concurrent first requests for the same thumbnail are collapsed: every thread
+of every worker takes an ``flock`` of the thumbnail's own ``<key>.lock`` file,
+so each thumbnail is encoded once and unrelated thumbnails never wait on each
+other. Uploads get a fresh storage name when replaced, so responses can be
+cached by browsers as immutable.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from PIL import Image
+
+from . import images
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent first requests each encode the thumbnail
+    fcntl = None
+
+
+SIGNING_SALT = 'portfolio.thumbnails'
+# Bump to regenerate every cached thumbnail after changing the encoding below
+THUMBNAIL_VERSION = 2
+FORMAT = 'webp'
+
+
+def thumbnail_url(field_file, size):
+    """URL of the ``size`` preset thumbnail of an uploaded file"""
+    # No timestamp, so the URL is the same on every render and browsers can keep the response
+    token = signing.Signer(salt=SIGNING_SALT).sign_object([field_file.name, size], compress=True)
+    return reverse('thumbnail', args=[token])
+
+
+def load_token(token):
+    """``(name, size)`` from a thumbnail URL token, or None if it is forged or for a removed preset"""
+    try:
+        name, size = signing.Signer(salt=SIGNING_SALT).unsign_object(token)
+    except (signing.BadSignature, ValueError):
+        return None
+    if size not in settings.THUMBNAIL_SIZES:
+        return None
+    return name, size
+
+
+# =============================================================================
+# Disk Cache
+# =============================================================================
+
+def _cache_path(name, size):
+    box = settings.THUMBNAIL_SIZES[size]
+    stat = f'{default_storage.size(name)}:{default_storage.get_modified_time(name).timestamp()}'
+    key = hashlib.sha256(f'{THUMBNAIL_VERSION}|{name}|{stat}|{box[0]}x{box[1]}'.encode()).hexdigest()
+    return Path(settings.THUMBNAIL_CACHE_DIR) / key[:2] / f'{key}.{FORMAT}'
+
+
+def _render(name, size):
+    with default_storage.open(name) as upload:
+        image, _ = images.open_image(upload)
+    # Only ever shrinks, so small uploads such as icons are not blown up
+    image.thumbnail(settings.THUMBNAIL_SIZES[size], Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format=FORMAT.upper(), quality=80, method=4)
+    return buffer.getvalue()
+
+
+def get_thumbnail(name, size):
+    """Path of the cached thumbnail, generating it if needed; None if the upload is missing or unreadable"""
+    try:
+        path = _cache_path(name, size)
+    except OSError:
+        return None
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # flock conflicts between separate open()s, so threads of one worker wait too
+    with open(path.with_suffix('.lock'), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # Whoever held the lock before us may have written it already
+        if not path.exists():
+            try:
+                data = _render(name, size)
+            except (OSError, ValueError, SyntaxError, Image.DecompressionBombError):
+                return None
+            # Written aside and renamed, so readers never see half a file
+            fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, 'wb') as temp:
+                temp.write(data)
+            os.replace(temp_path, path)
+    return path
@@ -0,0 +1,105 @@
+"""
+Tools data - Default tool list and the pre-serialized tools payload
+
+The active tools are serialized once per worker into JSON bytes plus gzip and
+brotli variants for /api/tools/, and into the ``json_script`` element that
+base.html embeds for the 3D scene. The payload is only rebuilt after a Tool
+is saved or deleted, which bumps the ``tools`` cache group (see signals.py).
+"""
+
+import gzip
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.html import json_script
+from django.utils.http import quote_etag
+
+from .cache import LocalValue, TOOLS
+from .models import Tool
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; clients then fall back to gzip
+    brotli = None
+
+
+def get_default_tools():
+    """Return default tools data when database is empty"""
+    return [
+        {'name': 'Docker', 'icon_url': '/static/image/tools/docker.png', 'description': 'Container platform for building, shipping, and running applications in isolated environments.', 'category': 'Containerization', 'color': '#2496ED', 'link': ''},
+        {'name': 'Kubernetes', 'icon_url': '/static/image/tools/kubernetes.png', 'description': 'Container orchestration platform for automating deployment, scaling, and management.', 'category': 'Orchestration', 'color': '#326CE5', 'link': ''},
+        {'name': 'Jenkins', 'icon_url': '/static/image/tools/jenkins.png', 'description': 'Open-source automation server for CI/CD pipelines.', 'category': 'CI/CD', 'color': '#D33833', 'link': ''},
+        {'name': 'Terraform', 'icon_url': '/static/image/tools/terraform.png', 'description': 'Infrastructure as Code tool for building cloud infrastructure.', 'category': 'Infrastructure as Code', 'color': '#7B42BC', 'link': ''},
+        {'name': 'AWS', 'icon_url': '/static/image/tools/aws.png', 'description': 'Amazon Web Services - comprehensive cloud computing platform.', 'category': 'Cloud', 'color': '#FF9900', 'link': ''},
+        {'name': 'Azure', 'icon_url': '/static/image/tools/azure.png', 'description': 'Microsoft Azure cloud computing platform and services.', 'category': 'Cloud', 'color': '#0078D4', 'link': ''},
+        {'name': 'Git', 'icon_url': '/static/image/tools/git.png', 'description': 'Distributed version control system for source code.', 'category': 'Version Control', 'color': '#F05032', 'link': ''},
+        {'name': 'GitLab', 'icon_url': '/static/image/tools/gitlab.png', 'description': 'DevOps platform for the complete software development lifecycle.', 'category': 'CI/CD', 'color': '#FC6D26', 'link': ''},
+        {'name': 'Ansible', 'icon_url': '/static/image/tools/ansible.png', 'description': 'Agentless automation tool for configuration management.', 'category': 'Configuration', 'color': '#EE0000', 'link': ''},
+        {'name': 'Prometheus', 'icon_url': '/static/image/tools/prometheus.png', 'description': 'Open-source monitoring and alerting toolkit.', 'category': 'Monitoring', 'color': '#E6522C', 'link': ''},
+        {'name': 'Grafana', 'icon_url': '/static/image/tools/grafana.png', 'description': 'Analytics and interactive visualization platform.', 'category': 'Monitoring', 'color': '#F46800', 'link': ''},
+        {'name': 'Linux', 'icon_url': '/static/image/tools/linux.png', 'description': 'Open-source OS kernel powering most servers.', 'category': 'Operating System', 'color': '#FCC624', 'link': ''},
+        {'name': 'Python', 'icon_url': '/static/image/tools/python.png', 'description': 'Programming language for automation and scripting.', 'category': 'Programming', 'color': '#3776AB', 'link': ''},
+        {'name': 'Nginx', 'icon_url': '/static/image/tools/nginx.png', 'description': 'High-performance web server and reverse proxy.', 'category': 'Web Server', 'color': '#009639', 'link': ''},
+        {'name': 'Helm', 'icon_url': '/static/image/tools/helm.png', 'description': 'Package manager for Kubernetes applications.', 'category': 'Orchestration', 'color': '#0F1689', 'link': ''},
+        {'name': 'Bash', 'icon_url': '/static/image/tools/bash.png', 'description': 'Unix shell and command language for scripting.', 'category': 'Scripting', 'color': '#4EAA25', 'link': ''},
+        {'name': 'Datadog', 'icon_url': '/static/image/tools/datadog.png', 'description': 'Monitoring and analytics platform for cloud apps.', 'category': 'Monitoring', 'color': '#632CA6', 'link': ''},
+        {'name': 'SonarQube', 'icon_url': '/static/image/tools/sonarqube.png', 'description': 'Code quality and security analysis tool.', 'category': 'Security', 'color': '#4E9BCD', 'link': ''},
+        {'name': 'Trivy', 'icon_url': '/static/image/tools/trivy.png', 'description': 'Container vulnerability scanner.', 'category': 'Security', 'color': '#1904DA', 'link': ''},
+        {'name': 'Maven', 'icon_url': '/static/image/tools/mavne.png', 'description': 'Build automation tool for Java projects.', 'category': 'Build', 'color': '#C71A36', 'link': ''},
+        {'name': 'Snyk', 'icon_url': '/static/image/tools/snyk.png', 'description': 'Developer security platform for finding vulnerabilities.', 'category': 'Security', 'color': '#4C4A73', 'link': ''},
+        {'name': 'JFrog', 'icon_url': '/static/image/tools/jfrog.png', 'description': 'Universal artifact repository manager.', 'category': 'Artifacts', 'color': '#40BE46', 'link': ''},
+    ]
+
+
+class ToolsPayload:
+    """Serialized tools list with pre-compressed variants and strong ETags"""
+
+    def __init__(self, tools_data):
+        self.data = tools_data
+        self.body = json.dumps({'tools': tools_data}, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+        self.script = json_script({'tools': tools_data}, 'tools-data')
+
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.variants = {None: (self.body, quote_etag(digest))}
+        self.variants['gzip'] = (gzip.compress(self.body, compresslevel=9, mtime=0), quote_etag(f'{digest}-gzip'))
+        if brotli is not None:
+            self.variants['br'] = (brotli.compress(self.body), quote_etag(f'{digest}-br'))
+
+    def negotiate(self, accept_encoding):
+        """Return ``(body, content_encoding, etag)`` for an Accept-Encoding header"""
+        accepted = set()
+        for part in accept_encoding.split(','):
+            coding, *params = part.split(';')
+            quality = 1.0
+            for param in params:
+                name, _, value = param.partition('=')
+                if name.strip().lower() == 'q':
+                    try:
+                        quality = float(value.strip())
+                    except ValueError:
+                        quality = 0.0
+            if quality <= 0:
+                continue  # q=0 means "not acceptable"
+            accepted.add(coding.strip().lower())
+
+        for encoding in ('br', 'gzip'):
+            if encoding in accepted and encoding in self.variants:
+                body, etag = self.variants[encoding]
+                return body, encoding, etag
+
+        body, etag = self.variants[None]
+        return body, None, etag
+
+
+def _build_tools_payload():
+    tools_data = [tool.to_dict() for tool in Tool.objects.filter(is_active=True)]
+    return ToolsPayload(tools_data or get_default_tools())
+
+
+_tools_payload = LocalValue(TOOLS, _build_tools_payload)
+
+
+def get_tools_payload():
+    """Return this worker's copy of the tools payload, rebuilding it if stale"""
+    return _tools_payload.get()
@@ -9,12 +9,15 @@ urlpatterns = [
     # Home
     path('', views.home, name='home'),
     path('contact/', views.contact_submit, name='contact_submit'),
+    path('contact/token/', views.contact_token, name='contact_token'),
 
     # Projects
     path('projects/', views.projects_list, name='projects_list'),
 
     # Blog
     path('blog/', views.blog_list, name='blog_list'),
+    # Outside /blog/<slug>/, so no article slug can shadow it or be shadowed
+    path('search/blog/', views.blog_search, name='blog_search'),
     path('blog/<slug:slug>/', views.article_detail, name='article_detail'),
     path('blog/tag/<slug:tag_slug>/', views.blog_by_tag, name='blog_by_tag'),
 
@@ -23,4 +26,12 @@ urlpatterns = [
 
     # API
     path('api/tools/', views.tools_api, name='tools_api'),
+    path('api/blog/search/', views.blog_search_api, name='blog_search_api'),
+    path('api/projects/facets/', views.project_facets_api, name='project_facets_api'),
+
+    # Admin image previews
+    path('thumbnails/<str:token>', views.thumbnail, name='thumbnail'),
+
+    # Prometheus
+    path('metrics', views.metrics_view, name='metrics'),
 ]
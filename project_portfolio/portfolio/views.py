@@ -2,30 +2,43 @@
 Portfolio views - Handle all page rendering and form processing
 """
 
+from urllib.parse import urlencode
+
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.views.decorators.http import require_POST
-from django.core.mail import send_mail
 from django.core.paginator import Paginator
 from django.conf import settings
+from django.middleware.csrf import get_token
 from django.contrib import messages
-from django.db.models import Q
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q, Subquery, Value, prefetch_related_objects
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers, add_never_cache_headers
+from django.utils.crypto import constant_time_compare
 
 from .models import (
     Project, Skill, ContactMessage, SiteSettings,
     ProjectCategory, Technology,
     Tag, Article,
     WorkExperience, Education, Certification, ResumeSettings,
-    Testimonial, Tool
+    Testimonial, Tool, ARTICLE_SUMMARY_FIELDS
 )
 from .forms import ContactForm
+from .cache import cached_page, HOME, PROJECTS, BLOG, RESUME
+from .tools_data import get_tools_payload
+from .related_articles import RELATED_LIMIT
+from .pagination import KeysetPaginator
+from .resume_data import ResumeData, fragment_version
+from .facets import get_project_facets
+from . import article_search, metrics, outbox, project_search, ratelimit, thumbnails
 
 
 def get_site_context():
     """Get common context data for all views"""
     try:
         site_settings = SiteSettings.get_settings()
-    except Exception:
+    except DatabaseError:
+        # Settings table not migrated yet
         site_settings = None
 
     return {
@@ -33,21 +46,51 @@ def get_site_context():
         'author': settings.SITE_CONFIG.get('author', 'Joni K'),
         'email': settings.SITE_CONFIG.get('email', 'johngezae@yahoo.com'),
         'social': settings.SITE_CONFIG.get('social', {}),
+        'tools_json_script': get_tools_payload().script,
     }
 
 
+def latest_update(*querysets):
+    """Return the newest ``updated_at`` across site-wide data and querysets in one query"""
+    # Every page embeds the tools payload and the site settings, so both count as site-wide
+    querysets += (Tool.objects.all(), SiteSettings.objects.all())
+    # One SELECT of scalar subqueries, so an empty table (e.g. no settings row yet) yields
+    # NULL for that column instead of no row at all
+    columns, params = [], []
+    for queryset in querysets:
+        sql, query_params = queryset.order_by('-updated_at').values('updated_at')[:1].query.sql_with_params()
+        columns.append(f'({sql})')
+        params.extend(query_params)
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {", ".join(columns)}', params)
+        row = cursor.fetchone()
+
+    # Raw cursors skip the ORM's converters (SQLite returns text)
+    field = Tool._meta.get_field('updated_at')
+    converters = connection.ops.get_db_converters(Value(None, output_field=field))
+    values = []
+    for value in row:
+        for converter in converters:
+            value = converter(value, Value(None, output_field=field), connection)
+        if value is not None:
+            values.append(value)
+    return max(values, default=None)
+
+
+def home_last_modified(request):
+    return latest_update(Project.objects.all(), Testimonial.objects.all())
+
+
+@cached_page(HOME, last_modified=home_last_modified)
 def home(request):
     """Home page view - displays all sections"""
     context = get_site_context()
 
     # Get projects from database that should show on homepage
-    db_projects = Project.objects.filter(show_on_homepage=True).prefetch_related('technologies', 'project_category')
+    db_projects = Project.objects.filter(show_on_homepage=True).select_related('project_category')
 
     # If no projects in database, use default projects
-    if db_projects.exists():
-        projects = db_projects
-    else:
-        projects = get_default_projects()
+    projects = list(db_projects) or get_default_projects()
 
     # Get project categories for filtering tabs
     categories = ProjectCategory.objects.all()
@@ -69,34 +112,60 @@ def home(request):
     return render(request, 'home.html', context)
 
 
+def _contact_rate_limited(request, is_ajax, retry_after):
+    error = 'Too many messages. Please try again later.'
+    if is_ajax:
+        response = JsonResponse({'success': False, 'error': error}, status=429)
+    else:
+        messages.error(request, error)
+        response = redirect('home')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def contact_token(request):
+    """CSRF token (and its cookie) for contact forms on statically exported pages"""
+    response = JsonResponse({'token': get_token(request)})
+    add_never_cache_headers(response)
+    return response
+
+
 @require_POST
 def contact_submit(request):
     """Handle contact form submission"""
+    is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+    # Before anything touches the database, so a flood costs at most a few cache calls
+    retry_after = ratelimit.contact_retry_after(request)
+    if retry_after:
+        return _contact_rate_limited(request, is_ajax, retry_after)
+
     form = ContactForm(request.POST)
 
     if form.is_valid():
-        # Save to database
-        contact = ContactMessage.objects.create(
-            full_name=form.cleaned_data['full_name'],
-            email=form.cleaned_data['email'],
-            message=form.cleaned_data['message']
-        )
-
-        # Send email notification
-        try:
-            send_mail(
-                subject=f"Portfolio Contact: {form.cleaned_data['full_name']}",
-                message=f"From: {form.cleaned_data['full_name']}\n"
-                        f"Email: {form.cleaned_data['email']}\n\n"
-                        f"Message:\n{form.cleaned_data['message']}",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[settings.SITE_CONFIG.get('email', 'johngezae@yahoo.com')],
-                fail_silently=True,
-            )
-        except Exception:
-            pass  # Email sending is optional
-
-        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        retry_after = ratelimit.contact_retry_after(request, email=form.cleaned_data['email'])
+        if retry_after:
+            return _contact_rate_limited(request, is_ajax, retry_after)
+
+        fingerprint = ratelimit.contact_fingerprint(form.cleaned_data)
+        # A resubmitted message (double click, retrying client) is answered but not stored again
+        if ratelimit.is_duplicate(ratelimit.CONTACT, fingerprint, settings.CONTACT_DUPLICATE_WINDOW):
+            metrics.count_rate_limited(f'{ratelimit.CONTACT}:duplicate')
+        else:
+            try:
+                # Save the message and queue its notification together; send_outbox delivers it
+                with transaction.atomic():
+                    contact = ContactMessage.objects.create(
+                        full_name=form.cleaned_data['full_name'],
+                        email=form.cleaned_data['email'],
+                        message=form.cleaned_data['message']
+                    )
+                    outbox.enqueue_contact_notification(contact)
+            except Exception:
+                ratelimit.forget_submission(ratelimit.CONTACT, fingerprint)
+                raise
+
+        if is_ajax:
             return JsonResponse({
                 'success': True,
                 'message': "Thank you! I'll get back to you as soon as possible."
@@ -105,7 +174,7 @@ def contact_submit(request):
         messages.success(request, "Thank you! I'll get back to you as soon as possible.")
         return redirect('home')
 
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+    if is_ajax:
         return JsonResponse({
             'success': False,
             'error': 'Please check all fields and try again.'
@@ -191,11 +260,17 @@ def get_default_projects():
 # Projects Page Views
 # =============================================================================
 
+def projects_last_modified(request):
+    return latest_update(Project.objects.all())
+
+
+@cached_page(PROJECTS, last_modified=projects_last_modified, params=('q', 'category', 'tech'))
 def projects_list(request):
     """Projects page with filtering"""
     context = get_site_context()
 
-    projects = Project.objects.all().prefetch_related('technologies', 'project_category')
+    # Technology names come from the denormalized technology_buckets column
+    projects = Project.objects.all().select_related('project_category')
     categories = ProjectCategory.objects.all()
     technologies = Technology.objects.all()
 
@@ -204,7 +279,11 @@ def projects_list(request):
     category_slug = request.GET.get('category', '')
     tech_slug = request.GET.get('tech', '')
 
-    if search_query:
+    ranked_ids = project_search.search(search_query) if search_query else None
+
+    if ranked_ids is not None:
+        projects = projects.filter(pk__in=ranked_ids)
+    elif search_query:
         projects = projects.filter(
             Q(title__icontains=search_query) |
             Q(description__icontains=search_query)
@@ -214,9 +293,12 @@ def projects_list(request):
         projects = projects.filter(project_category__slug=category_slug)
 
     if tech_slug:
-        projects = projects.filter(technologies__slug=tech_slug)
+        projects = projects.filter(technologies__slug=tech_slug).distinct()
 
-    projects = projects.distinct()
+    if ranked_ids is not None:
+        # Most relevant first
+        rank = {pk: position for position, pk in enumerate(ranked_ids)}
+        projects = sorted(projects, key=lambda project: rank[project.pk])
 
     context.update({
         'projects': projects,
@@ -230,21 +312,77 @@ def projects_list(request):
     return render(request, 'projects.html', context)
 
 
+def project_facets_api(request):
+    """Matching project ids plus category and technology counts for a filter combination"""
+    facets = get_project_facets()
+
+    within = None
+    search_query = request.GET.get('q', '').strip()
+    if search_query:
+        matching_ids = project_search.search(search_query)
+        if matching_ids is None:
+            matching_ids = Project.objects.filter(
+                Q(title__icontains=search_query) |
+                Q(description__icontains=search_query)
+            ).values_list('pk', flat=True)
+        within = facets.mask_for_ids(matching_ids)
+
+    return JsonResponse(facets.query(
+        categories=request.GET.getlist('category'),
+        technologies=request.GET.getlist('tech'),
+        within=within,
+    ))
+
+
 # =============================================================================
 # Blog Views
 # =============================================================================
 
+ARTICLES_PER_PAGE = 9
+
+
+def blog_last_modified(request, *args, **kwargs):
+    # Drafts are included so that unpublishing an article also counts as a change
+    return latest_update(Article.objects.all())
+
+
+def _page_number_redirect(request, paginator):
+    """Redirect a ``?page=N`` link from before cursor pagination to its cursor URL; None without one"""
+    page = request.GET.get('page')
+    if page is None:
+        return None
+    try:
+        number = int(page)
+    except ValueError:
+        raise Http404('Invalid page')
+    if number == 1:
+        return redirect(request.path, permanent=True)
+    cursor = paginator.cursor_for_page(number) if number > 1 else None
+    if cursor is None:
+        raise Http404('No such page')
+    # Temporary: the page a number maps to moves as articles are published
+    return redirect(f'{request.path}?{urlencode({"cursor": cursor})}')
+
+
+@cached_page(BLOG, last_modified=blog_last_modified, params=('cursor', 'page'))
 def blog_list(request):
     """Blog listing page with pagination"""
+    articles = Article.objects.published().summaries()
+
+    # Pagination
+    paginator = KeysetPaginator(articles, ARTICLES_PER_PAGE, group=BLOG)
+    legacy_redirect = _page_number_redirect(request, paginator)
+    if legacy_redirect:
+        return legacy_redirect
+
     context = get_site_context()
+    page_obj = paginator.get_page(request.GET.get('cursor'))
 
-    articles = Article.objects.filter(status='published').prefetch_related('tags')
-    featured_articles = articles.filter(is_featured=True)[:3]
+    # Featured articles are only shown above the first page
+    featured_articles = list(articles.filter(is_featured=True)[:3]) if page_obj.number == 1 else []
 
-    # Pagination
-    paginator = Paginator(articles, 9)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # One tag query for both lists
+    prefetch_related_objects(page_obj.object_list + featured_articles, 'tags')
 
     # All tags for sidebar/filter
     tags = Tag.objects.all()
@@ -259,17 +397,21 @@ def blog_list(request):
     return render(request, 'blog/blog_list.html', context)
 
 
+@cached_page(BLOG, last_modified=blog_last_modified)
 def article_detail(request, slug):
     """Individual article page"""
     context = get_site_context()
 
-    article = get_object_or_404(Article, slug=slug, status='published')
+    # The raw Markdown is not shown; content_html is
+    article = get_object_or_404(Article.objects.published().defer('content'), slug=slug)
 
-    # Related articles (same tags)
-    related_articles = Article.objects.filter(
-        status='published',
-        tags__in=article.tags.all()
-    ).exclude(id=article.id).distinct()[:3]
+    # Precomputed by related_articles.py
+    related_articles = [
+        link.related for link in
+        article.related_links.select_related('related').only(
+            'article_id', *(f'related__{field}' for field in ARTICLE_SUMMARY_FIELDS),
+        ).order_by('-score')[:RELATED_LIMIT]
+    ]
 
     context.update({
         'article': article,
@@ -279,16 +421,19 @@ def article_detail(request, slug):
     return render(request, 'blog/article_detail.html', context)
 
 
+@cached_page(BLOG, last_modified=blog_last_modified, params=('cursor', 'page'))
 def blog_by_tag(request, tag_slug):
     """Filter articles by tag"""
-    context = get_site_context()
-
     tag = get_object_or_404(Tag, slug=tag_slug)
-    articles = Article.objects.filter(status='published', tags=tag).prefetch_related('tags')
+    articles = Article.objects.published().filter(tags=tag).summaries().prefetch_related('tags')
 
-    paginator = Paginator(articles, 9)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(articles, ARTICLES_PER_PAGE, group=BLOG)
+    legacy_redirect = _page_number_redirect(request, paginator)
+    if legacy_redirect:
+        return legacy_redirect
+
+    context = get_site_context()
+    page_obj = paginator.get_page(request.GET.get('cursor'))
 
     tags = Tag.objects.all()
 
@@ -302,32 +447,92 @@ def blog_by_tag(request, tag_slug):
     return render(request, 'blog/blog_list.html', context)
 
 
+def search_articles(request, per_page=ARTICLES_PER_PAGE):
+    """Rank published articles against ``?q=`` and highlight one page of them"""
+    query = request.GET.get('q', '').strip()
+    results = article_search.search(query)
+
+    paginator = Paginator(results.ranked, per_page)
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    # Only the articles on this page are loaded from the database
+    scores = dict(page_obj.object_list)
+    # content is needed for the snippets, but only for this page's articles
+    articles = Article.objects.filter(pk__in=scores).summaries('content').prefetch_related('tags')
+    articles = sorted(articles, key=lambda article: (-scores[article.pk], article.pk))
+    for article in articles:
+        article.search_score = scores[article.pk]
+    page_obj.object_list = article_search.attach_highlights(articles, results.terms)
+
+    return query, page_obj
+
+
+@cached_page(BLOG, last_modified=blog_last_modified, params=('q', 'page'))
+def blog_search(request):
+    """Full-text search over published articles"""
+    context = get_site_context()
+
+    query, page_obj = search_articles(request)
+
+    context.update({
+        'articles': page_obj,
+        'page_obj': page_obj,
+        'search_query': query,
+        'tags': Tag.objects.all(),
+    })
+
+    return render(request, 'blog/blog_search.html', context)
+
+
+@cached_page(BLOG, last_modified=blog_last_modified, params=('q', 'page'))
+def blog_search_api(request):
+    """JSON search results with highlighted title and snippet HTML"""
+    query, page_obj = search_articles(request, per_page=10)
+
+    return JsonResponse({
+        'query': query,
+        'count': page_obj.paginator.count,
+        'page': page_obj.number,
+        'num_pages': page_obj.paginator.num_pages,
+        'results': [
+            {
+                'title': article.title,
+                'title_html': article.search_title,
+                'snippet_html': article.search_snippet,
+                'url': article.get_absolute_url(),
+                'score': round(article.search_score, 4),
+                'published_at': article.published_at.isoformat() if article.published_at else None,
+                'tags': [tag.name for tag in article.tags.all()],
+            }
+            for article in page_obj
+        ],
+    })
+
+
 # =============================================================================
 # Resume View
 # =============================================================================
 
+def resume_last_modified(request):
+    return latest_update(
+        ResumeSettings.objects.all(),
+        WorkExperience.objects.all(),
+        Education.objects.all(),
+        Certification.objects.all(),
+        Skill.objects.all(),
+    )
+
+
+@cached_page(RESUME, last_modified=resume_last_modified)
 def resume(request):
     """Resume/CV page view"""
     context = get_site_context()
 
-    resume_settings = ResumeSettings.get_settings()
-    work_experiences = WorkExperience.objects.all()
-    education = Education.objects.all()
-    certifications = Certification.objects.all()
-    skills = Skill.objects.all()
-
+    # Queried only if the cached resume body fragment is missing
     context.update({
-        'resume_settings': resume_settings,
-        'work_experiences': work_experiences,
-        'education': education,
-        'certifications': certifications,
-        'skills_by_category': {
-            'frontend': skills.filter(category='frontend'),
-            'backend': skills.filter(category='backend'),
-            'devops': skills.filter(category='devops'),
-            'database': skills.filter(category='database'),
-            'other': skills.filter(category='other'),
-        },
+        'resume_settings': ResumeSettings.get_settings(),
+        'resume': ResumeData(),
+        'resume_fragment_version': fragment_version(),
     })
 
     return render(request, 'resume.html', context)
@@ -337,41 +542,60 @@ def resume(request):
 # Tools API
 # =============================================================================
 
-def get_default_tools():
-    """Return default tools data when database is empty"""
-    return [
-        {'name': 'Docker', 'icon_url': '/static/image/tools/docker.png', 'description': 'Container platform for building, shipping, and running applications in isolated environments.', 'category': 'Containerization', 'color': '#2496ED', 'link': ''},
-        {'name': 'Kubernetes', 'icon_url': '/static/image/tools/kubernetes.png', 'description': 'Container orchestration platform for automating deployment, scaling, and management.', 'category': 'Orchestration', 'color': '#326CE5', 'link': ''},
-        {'name': 'Jenkins', 'icon_url': '/static/image/tools/jenkins.png', 'description': 'Open-source automation server for CI/CD pipelines.', 'category': 'CI/CD', 'color': '#D33833', 'link': ''},
-        {'name': 'Terraform', 'icon_url': '/static/image/tools/terraform.png', 'description': 'Infrastructure as Code tool for building cloud infrastructure.', 'category': 'Infrastructure as Code', 'color': '#7B42BC', 'link': ''},
-        {'name': 'AWS', 'icon_url': '/static/image/tools/aws.png', 'description': 'Amazon Web Services - comprehensive cloud computing platform.', 'category': 'Cloud', 'color': '#FF9900', 'link': ''},
-        {'name': 'Azure', 'icon_url': '/static/image/tools/azure.png', 'description': 'Microsoft Azure cloud computing platform and services.', 'category': 'Cloud', 'color': '#0078D4', 'link': ''},
-        {'name': 'Git', 'icon_url': '/static/image/tools/git.png', 'description': 'Distributed version control system for source code.', 'category': 'Version Control', 'color': '#F05032', 'link': ''},
-        {'name': 'GitLab', 'icon_url': '/static/image/tools/gitlab.png', 'description': 'DevOps platform for the complete software development lifecycle.', 'category': 'CI/CD', 'color': '#FC6D26', 'link': ''},
-        {'name': 'Ansible', 'icon_url': '/static/image/tools/ansible.png', 'description': 'Agentless automation tool for configuration management.', 'category': 'Configuration', 'color': '#EE0000', 'link': ''},
-        {'name': 'Prometheus', 'icon_url': '/static/image/tools/prometheus.png', 'description': 'Open-source monitoring and alerting toolkit.', 'category': 'Monitoring', 'color': '#E6522C', 'link': ''},
-        {'name': 'Grafana', 'icon_url': '/static/image/tools/grafana.png', 'description': 'Analytics and interactive visualization platform.', 'category': 'Monitoring', 'color': '#F46800', 'link': ''},
-        {'name': 'Linux', 'icon_url': '/static/image/tools/linux.png', 'description': 'Open-source OS kernel powering most servers.', 'category': 'Operating System', 'color': '#FCC624', 'link': ''},
-        {'name': 'Python', 'icon_url': '/static/image/tools/python.png', 'description': 'Programming language for automation and scripting.', 'category': 'Programming', 'color': '#3776AB', 'link': ''},
-        {'name': 'Nginx', 'icon_url': '/static/image/tools/nginx.png', 'description': 'High-performance web server and reverse proxy.', 'category': 'Web Server', 'color': '#009639', 'link': ''},
-        {'name': 'Helm', 'icon_url': '/static/image/tools/helm.png', 'description': 'Package manager for Kubernetes applications.', 'category': 'Orchestration', 'color': '#0F1689', 'link': ''},
-        {'name': 'Bash', 'icon_url': '/static/image/tools/bash.png', 'description': 'Unix shell and command language for scripting.', 'category': 'Scripting', 'color': '#4EAA25', 'link': ''},
-        {'name': 'Datadog', 'icon_url': '/static/image/tools/datadog.png', 'description': 'Monitoring and analytics platform for cloud apps.', 'category': 'Monitoring', 'color': '#632CA6', 'link': ''},
-        {'name': 'SonarQube', 'icon_url': '/static/image/tools/sonarqube.png', 'description': 'Code quality and security analysis tool.', 'category': 'Security', 'color': '#4E9BCD', 'link': ''},
-        {'name': 'Trivy', 'icon_url': '/static/image/tools/trivy.png', 'description': 'Container vulnerability scanner.', 'category': 'Security', 'color': '#1904DA', 'link': ''},
-        {'name': 'Maven', 'icon_url': '/static/image/tools/mavne.png', 'description': 'Build automation tool for Java projects.', 'category': 'Build', 'color': '#C71A36', 'link': ''},
-        {'name': 'Snyk', 'icon_url': '/static/image/tools/snyk.png', 'description': 'Developer security platform for finding vulnerabilities.', 'category': 'Security', 'color': '#4C4A73', 'link': ''},
-        {'name': 'JFrog', 'icon_url': '/static/image/tools/jfrog.png', 'description': 'Universal artifact repository manager.', 'category': 'Artifacts', 'color': '#40BE46', 'link': ''},
-    ]
-
-
 def tools_api(request):
     """API endpoint to serve tools data as JSON"""
-    tools = Tool.objects.filter(is_active=True)
+    payload = get_tools_payload()
+    body, encoding, etag = payload.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+        if encoding:
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.TOOLS_API_MAX_AGE,
+        stale_while_revalidate=settings.TOOLS_API_STALE_WHILE_REVALIDATE,
+    )
+    return response
 
-    if tools.exists():
-        tools_data = [tool.to_dict() for tool in tools]
-    else:
-        tools_data = get_default_tools()
 
-    return JsonResponse({'tools': tools_data})
+# =============================================================================
+# Thumbnails
+# =============================================================================
+
+def thumbnail(request, token):
+    """Preset-size WebP thumbnail of an upload, generated on first request (see thumbnails.py)"""
+    source = thumbnails.load_token(token)
+    if source is None:
+        raise Http404('Unknown thumbnail')
+    path = thumbnails.get_thumbnail(*source)
+    if path is None:
+        raise Http404('Thumbnail unavailable')
+
+    response = FileResponse(open(path, 'rb'), content_type=f'image/{thumbnails.FORMAT}')
+    # The URL names the upload, which gets a new name whenever it is replaced
+    patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    return response
+
+
+# =============================================================================
+# Metrics
+# =============================================================================
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, summed over every worker"""
+    # Off unless a scrape token is configured: the numbers describe the site's traffic
+    if not settings.METRICS_TOKEN:
+        raise Http404
+    authorization = request.headers.get('Authorization', '')
+    if not constant_time_compare(authorization, f'Bearer {settings.METRICS_TOKEN}'):
+        return HttpResponse(status=401)
+
+    response = HttpResponse(metrics.render_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    add_never_cache_headers(response)
+    return response
@@ -29,6 +29,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'portfolio.middleware.ProfilingMiddleware',
+    'portfolio.middleware.MetricsMiddleware',
+    'portfolio.middleware.QueryAuditMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -43,7 +46,8 @@ ROOT_URLCONF = 'project_portfolio.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to portfolio.metrics
+        'BACKEND': 'portfolio.template_backend.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -52,6 +56,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'portfolio.context_processors.page_cache_csrf',
             ],
         },
     },
@@ -79,6 +84,74 @@ else:
         }
     }
 
+# Cache - Redis when configured, otherwise a file cache shared by all workers on the box
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', BASE_DIR / '.cache' / 'django'),
+            'OPTIONS': {
+                'MAX_ENTRIES': 5000,
+            },
+        }
+    }
+
+# Full-page cache for anonymous visitors (invalidated by model signals)
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'True') == 'True'
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 60 * 60 * 24))
+# Release identifier mixed into page keys; defaults to a fingerprint of the templates
+PAGE_CACHE_RELEASE = os.environ.get('RELEASE', '')
+
+# Browser/CDN caching of the pre-serialized /api/tools/ payload
+TOOLS_API_MAX_AGE = int(os.environ.get('TOOLS_API_MAX_AGE', 60 * 60 * 24))
+TOOLS_API_STALE_WHILE_REVALIDATE = int(os.environ.get('TOOLS_API_STALE_WHILE_REVALIDATE', 60 * 60 * 24 * 7))
+
+# How often each worker checks whether its in-memory settings have been edited elsewhere
+LOCAL_CACHE_RECHECK_SECONDS = int(os.environ.get('LOCAL_CACHE_RECHECK_SECONDS', 5))
+
+# Query auditing (development): N+1 warnings and per-view query budgets
+QUERY_AUDIT_ENABLED = os.environ.get('QUERY_AUDIT', str(DEBUG)) == 'True'
+# Raise instead of logging when a budget is exceeded (set in CI and test runs)
+QUERY_AUDIT_STRICT = os.environ.get('QUERY_AUDIT_STRICT', 'False') == 'True'
+# A fingerprint run this many times in one request is reported as an N+1
+QUERY_AUDIT_REPEAT_THRESHOLD = int(os.environ.get('QUERY_AUDIT_REPEAT_THRESHOLD', 2))
+# Maximum queries per URL name on a full-page cache miss, once the worker's in-memory caches are warm
+QUERY_BUDGETS = {
+    'home': 4,
+    'projects_list': 5,
+    'project_facets_api': 4,
+    'blog_list': 5,
+    'blog_by_tag': 5,
+    'article_detail': 4,
+    'blog_search': 6,
+    'blog_search_api': 6,
+    'resume': 6,
+    'tools_api': 1,
+}
+
+# Prometheus metrics at /metrics, aggregated across workers through METRICS_DIR
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+METRICS_DIR = os.environ.get('METRICS_DIR', BASE_DIR / '.cache' / 'metrics')
+# How often each worker writes its snapshot for /metrics to read
+METRICS_FLUSH_SECONDS = int(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+# /metrics answers only requests with an "Authorization: Bearer <token>" header; 404 while unset
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Request profiling: share of requests profiled at random (0 disables sampling);
+# staff can always profile a request with a signed X-Profile header
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_SAMPLE_INTERVAL = float(os.environ.get('PROFILING_SAMPLE_INTERVAL', 0.001))
+PROFILING_TOKEN_MAX_AGE = int(os.environ.get('PROFILING_TOKEN_MAX_AGE', 60 * 60))
+# Number of stored profiles kept, newest first
+PROFILING_KEEP = int(os.environ.get('PROFILING_KEEP', 200))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -117,13 +190,45 @@ MEDIA_ROOT = BASE_DIR / 'media'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Email settings for contact form
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', '')
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 10))
+EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH', str(BASE_DIR / '.cache' / 'emails'))
+
+# On-demand thumbnails for admin previews (see portfolio/thumbnails.py)
+THUMBNAIL_CACHE_DIR = os.environ.get('THUMBNAIL_CACHE_DIR', str(BASE_DIR / '.cache' / 'thumbnails'))
+# Preset -> bounding box in pixels, twice the CSS size for high-density screens
+THUMBNAIL_SIZES = {
+    'list': (120, 80),
+    'icon': (64, 64),
+    'preview': (600, 400),
+    'icon_preview': (256, 256),
+}
+
+# Contact form flood protection (see portfolio/ratelimit.py)
+# Limit name -> (posts, seconds); 'ip' counts every post per client address, 'email' valid posts per sender address
+CONTACT_RATE_LIMITS = {
+    'ip': (int(os.environ.get('CONTACT_RATE_LIMIT_IP', 5)), 10 * 60),
+    'email': (int(os.environ.get('CONTACT_RATE_LIMIT_EMAIL', 3)), 60 * 60),
+}
+# Identical posts within this many seconds are acknowledged but stored once
+CONTACT_DUPLICATE_WINDOW = int(os.environ.get('CONTACT_DUPLICATE_WINDOW', 60 * 60))
+# Reverse proxies in front of the app that append to X-Forwarded-For
+RATELIMIT_PROXY_COUNT = int(os.environ.get('RATELIMIT_PROXY_COUNT', 0))
+
+# Email outbox (see portfolio/outbox.py): the contact form queues mail, send_outbox sends it
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 50))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8))
+# Retry n waits OUTBOX_BACKOFF_SECONDS * 2^(n-1), at most OUTBOX_MAX_BACKOFF_SECONDS
+OUTBOX_BACKOFF_SECONDS = int(os.environ.get('OUTBOX_BACKOFF_SECONDS', 60))
+OUTBOX_MAX_BACKOFF_SECONDS = int(os.environ.get('OUTBOX_MAX_BACKOFF_SECONDS', 6 * 60 * 60))
+# How long a worker holds a claimed batch before another worker may retry it
+OUTBOX_LEASE_SECONDS = int(os.environ.get('OUTBOX_LEASE_SECONDS', 300))
 
 # Site configuration
 SITE_CONFIG = {
@@ -57,44 +57,31 @@
     const tooltip = document.getElementById('tool-tooltip');
     const modal = document.getElementById('tool-modal');
 
-    // Fetch tools from Django backend
+    // Tools are embedded in the page by base.html, so the scene can start
+    // without waiting on a network round-trip
+    function getEmbeddedTools() {
+        const dataEl = document.getElementById('tools-data');
+        if (!dataEl) return null;
+        try {
+            return JSON.parse(dataEl.textContent).tools || [];
+        } catch (error) {
+            console.warn('Invalid embedded tools data');
+            return null;
+        }
+    }
+
+    // Fetch tools from Django backend (pages without embedded data)
     async function fetchTools() {
         try {
             const response = await fetch('/api/tools/');
             const data = await response.json();
             return data.tools || [];
         } catch (error) {
-            console.warn('Failed to fetch tools from API, using fallback data');
-            return getDefaultTools();
+            console.warn('Failed to fetch tools from API');
+            return [];
         }
     }
 
-    function getDefaultTools() {
-        return [
-            { name: 'Docker', icon_url: '/static/image/tools/docker.png', description: 'Container platform for building, shipping, and running applications.', category: 'Containerization', color: '#2496ED', link: '' },
-            { name: 'Kubernetes', icon_url: '/static/image/tools/kubernetes.png', description: 'Container orchestration platform.', category: 'Orchestration', color: '#326CE5', link: '' },
-            { name: 'Jenkins', icon_url: '/static/image/tools/jenkins.png', description: 'CI/CD automation server.', category: 'CI/CD', color: '#D33833', link: '' },
-            { name: 'Terraform', icon_url: '/static/image/tools/terraform.png', description: 'Infrastructure as Code tool.', category: 'IaC', color: '#7B42BC', link: '' },
-            { name: 'AWS', icon_url: '/static/image/tools/aws.png', description: 'Amazon Web Services cloud platform.', category: 'Cloud', color: '#FF9900', link: '' },
-            { name: 'Azure', icon_url: '/static/image/tools/azure.png', description: 'Microsoft Azure cloud platform.', category: 'Cloud', color: '#0078D4', link: '' },
-            { name: 'Git', icon_url: '/static/image/tools/git.png', description: 'Distributed version control system.', category: 'Version Control', color: '#F05032', link: '' },
-            { name: 'GitLab', icon_url: '/static/image/tools/gitlab.png', description: 'DevOps platform.', category: 'DevOps', color: '#FC6D26', link: '' },
-            { name: 'Ansible', icon_url: '/static/image/tools/ansible.png', description: 'Configuration management tool.', category: 'Configuration', color: '#EE0000', link: '' },
-            { name: 'Prometheus', icon_url: '/static/image/tools/prometheus.png', description: 'Monitoring and alerting toolkit.', category: 'Monitoring', color: '#E6522C', link: '' },
-            { name: 'Grafana', icon_url: '/static/image/tools/grafana.png', description: 'Analytics and visualization platform.', category: 'Visualization', color: '#F46800', link: '' },
-            { name: 'Linux', icon_url: '/static/image/tools/linux.png', description: 'Open-source operating system.', category: 'Operating System', color: '#FCC624', link: '' },
-            { name: 'Python', icon_url: '/static/image/tools/python.png', description: 'Programming language.', category: 'Programming', color: '#3776AB', link: '' },
-            { name: 'Nginx', icon_url: '/static/image/tools/nginx.png', description: 'Web server and reverse proxy.', category: 'Web Server', color: '#009639', link: '' },
-            { name: 'Helm', icon_url: '/static/image/tools/helm.png', description: 'Kubernetes package manager.', category: 'Orchestration', color: '#0F1689', link: '' },
-            { name: 'Bash', icon_url: '/static/image/tools/bash.png', description: 'Unix shell scripting.', category: 'Scripting', color: '#4EAA25', link: '' },
-            { name: 'Datadog', icon_url: '/static/image/tools/datadog.png', description: 'Cloud monitoring platform.', category: 'Monitoring', color: '#632CA6', link: '' },
-            { name: 'SonarQube', icon_url: '/static/image/tools/sonarqube.png', description: 'Code quality analysis.', category: 'Security', color: '#4E9BCD', link: '' },
-            { name: 'Trivy', icon_url: '/static/image/tools/trivy.png', description: 'Container vulnerability scanner.', category: 'Security', color: '#1904DA', link: '' },
-            { name: 'Maven', icon_url: '/static/image/tools/mavne.png', description: 'Build automation tool.', category: 'Build', color: '#C71A36', link: '' },
-            { name: 'Snyk', icon_url: '/static/image/tools/snyk.png', description: 'Security platform.', category: 'Security', color: '#4C4A73', link: '' },
-        ];
-    }
-
     // Create rounded rectangle shape
     function createRoundedRectShape(width, height, radius) {
         const shape = new THREE.Shape();
@@ -115,7 +102,7 @@
     }
 
     async function init() {
-        toolsData = await fetchTools();
+        toolsData = getEmbeddedTools() || await fetchTools();
 
         scene = new THREE.Scene();
 